@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import os
+from app.api.orgs import require_operator
+from app.db.master_repo import master_repo
+from app.db.indexes import index_report
+from app.db.monitoring import pool_stats
+from app.services.tenant_data_service import recent_transfers
+from app.services.tenant_index_service import TenantIndexService
+from app.services.tenant_pool_service import tenant_pool
+from app.services.job_service import JobService, job_runner
+from app.db.job_repo import job_repo
+from app.schemas.job_schema import JobResponse
+from app.core.security import password_hashing_stats, token_cache
+from app.core.profiling import list_profiles, profile_report
+from app.core.log import logging_stats
+
+router = APIRouter(prefix="/ops", tags=["Operations"], dependencies=[Depends(require_operator)])
+
+@router.get("/cache", response_model=dict)
+async def cache_stats():
+    return {"ok": True, "org_cache": master_repo.cache_stats(), "token_cache": token_cache.stats()}
+
+@router.get("/password-hashing", response_model=dict)
+async def password_hashing():
+    return {
+        "ok": True,
+        **password_hashing_stats(),
+        "stored_hash_costs": await master_repo.count_admins_by_hash_cost(),
+    }
+
+@router.get("/indexes", response_model=dict)
+async def indexes():
+    return {"ok": True, "collections": await index_report()}
+
+@router.get("/pool", response_model=dict)
+async def pool():
+    # Stats are per process. Every uvicorn worker has its own pool, so the
+    # server sees up to workers x max_pool_size connections from this app.
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    stats = pool_stats.stats()
+    return {
+        "ok": True,
+        "pid": os.getpid(),
+        "workers": workers,
+        "max_connections_per_server": workers * stats["max_pool_size"],
+        **stats,
+    }
+
+@router.get("/transfers", response_model=dict)
+async def transfers():
+    # Throughput of recent tenant exports/imports handled by this process
+    return {"ok": True, "transfers": list(recent_transfers)}
+
+@router.get("/tenant-pool", response_model=dict)
+async def tenant_pool_stats():
+    # Spare tenant collections per placement target
+    return {"ok": True, **await tenant_pool.stats()}
+
+@router.get("/deletions", response_model=dict)
+async def pending_deletions():
+    # Soft-deleted orgs whose data the reaper hasn't removed yet
+    return {"ok": True, "pending": await master_repo.count_deleted_orgs()}
+
+@router.get("/tenant-indexes", response_model=dict)
+async def tenant_index_drift(limit: int = 100, after: Optional[str] = None):
+    # Tenants missing template indexes, one page of tenants at a time
+    return {"ok": True, **await TenantIndexService.drift_report(min(max(limit, 1), 1000), after)}
+
+@router.post("/tenant-indexes/rollout", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def tenant_index_rollout():
+    if await job_repo.get_active_job(None, "tenant_index_rollout"):
+        raise HTTPException(status_code=409, detail="A tenant index rollout is already in progress")
+    job_id = await job_runner.submit("tenant_index_rollout", None, {})
+    return {"ok": True, "job_id": job_id}
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_global_job(job_id: str):
+    # Jobs that span every organization; per-org jobs stay under /org/jobs
+    job = await job_repo.get_job(job_id)
+    if not job or job.get("organization_id") is not None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobService.to_response(job)
+
+@router.get("/logging", response_model=dict)
+async def logging_queue():
+    # Records dropped because the writer fell behind, or skipped by sampling
+    return {"ok": True, **logging_stats()}
+
+@router.get("/profiles", response_model=dict)
+async def profiles():
+    # Newest first; files live in PROFILE_DIR for snakeviz / pstats
+    return {"ok": True, "profiles": list_profiles()}
+
+@router.get("/profiles/{name}", response_class=PlainTextResponse)
+async def profile(name: str, limit: int = 40, app_only: bool = True):
+    report = profile_report(name, min(max(limit, 1), 500), app_only)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
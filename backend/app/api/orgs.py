@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Annotated
-from app.schemas.org_schema import OrgCreateRequest, OrgResponse, OrgDeleteRequest, OrgUpdateRequest
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from typing import Annotated, List, Optional, Union
+from datetime import datetime
+from app.schemas.org_schema import (
+    OrgCreateRequest, OrgDeleteRequest, OrgUpdateRequest, OrgBulkCreateRequest,
+    OrgEnvelope, OrgBulkCreateResponse, OrgListResponse, OrgUpdateResponse, OrgRenameScheduledResponse,
+    OrgDeleteResponse
+)
 from app.schemas.auth_schema import TokenData
 from app.services.org_service import OrgService
-from app.services.migration_service import MigrationService
-from app.core.security import decode_access_token
-from fastapi.security import OAuth2PasswordBearer
+from app.services.job_service import JobService
+from app.schemas.job_schema import JobResponse
+from app.core.security import decode_access_token_cached, is_operator_token
+from app.core.responses import FastJSONResponse
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 
 router = APIRouter(prefix="/org", tags=["Organizations"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
+ops_token_scheme = APIKeyHeader(name="X-Ops-Token", auto_error=False)
 
 async def get_current_admin(token: Annotated[str, Depends(oauth2_scheme)]):
-    payload = decode_access_token(token)
+    payload = decode_access_token_cached(token)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -21,19 +29,66 @@ async def get_current_admin(token: Annotated[str, Depends(oauth2_scheme)]):
         )
     return TokenData(**payload)
 
-@router.post("/create", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def require_operator(token: Annotated[Optional[str], Depends(ops_token_scheme)]):
+    # Process- and cluster-wide data; tenant admin tokens never get through
+    if not is_operator_token(token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator credentials required")
+
+@router.post("/create", response_model=OrgEnvelope, status_code=status.HTTP_201_CREATED)
 async def create_org(request: OrgCreateRequest):
     org_response = await OrgService.create_organization(request)
-    return {"ok": True, "organization": org_response}
+    return OrgEnvelope(organization=org_response)
+
+@router.post(
+    "/bulk-create", response_model=OrgBulkCreateResponse, status_code=status.HTTP_201_CREATED,
+    # Up to ORG_BULK_CREATE_MAX_ITEMS bcrypt hashes per call: operators only
+    dependencies=[Depends(require_operator)]
+)
+async def bulk_create_orgs(body: OrgBulkCreateRequest, response: Response):
+    results = await OrgService.bulk_create_organizations(body.organizations)
+    created = sum(1 for result in results if result.organization is not None)
+    if created < len(results):
+        # Some items failed; each result carries its own status code
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return OrgBulkCreateResponse(ok=created == len(results), created=created, failed=len(results) - created, results=results)
+
+# Every organization's metadata, so operators only; tenant admins read
+# their own org through /org/get
+@router.get("/list", response_model=OrgListResponse, dependencies=[Depends(require_operator)])
+async def list_orgs(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. organization_name,created_at")
+):
+    page = await OrgService.list_organizations(
+        limit,
+        cursor,
+        name_prefix=name_prefix,
+        created_after=created_after,
+        created_before=created_before,
+        fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    )
+    # Rows are projections of any field subset, so there is no model to
+    # dump them through; orjson writes the page as is
+    return FastJSONResponse({"ok": True, **page})
 
-@router.get("/get", response_model=dict)
+@router.get("/get", response_model=OrgEnvelope)
 async def get_org(organization_name: str):
-    org_response = await OrgService.get_organization(organization_name)
-    return {"ok": True, "organization": org_response}
+    # The raw document goes to the response model, which validates it once
+    # and only lets OrgResponse's fields through
+    org = await OrgService.get_organization_doc(organization_name)
+    return {"ok": True, "organization": org}
 
-@router.put("/update", response_model=dict)
+@router.put(
+    "/update", response_model=Union[OrgRenameScheduledResponse, OrgUpdateResponse],
+    responses={status.HTTP_202_ACCEPTED: {"model": OrgRenameScheduledResponse}}
+)
 async def update_org(
     body: OrgUpdateRequest,
+    response: Response,
     current_admin: Annotated[TokenData, Depends(get_current_admin)]
 ):
     # 1. Authorize: Admin must own the org he is trying to update
@@ -46,6 +101,7 @@ async def update_org(
         raise HTTPException(status_code=403, detail="Unauthorized to update this organization")
 
     # 2. Rename Logic
+    job_id = None
     if body.new_organization_name and body.new_organization_name != body.organization_name:
         # Check uniqueness of new name
         try:
@@ -54,13 +110,10 @@ async def update_org(
                 raise HTTPException(status_code=409, detail="New organization name already exists")
         except HTTPException as e:
             if e.status_code != 404: raise e
-        
-        # Initiate Migration
-        await MigrationService.perform_migration(
-            body.organization_name, 
-            body.new_organization_name, 
-            target_org.id
-        )
+
+        # Metadata-only for orgs with a storage key; legacy orgs get a
+        # background migration job that clients poll via /org/jobs/{job_id}
+        job_id = await OrgService.rename_organization(target_org.id, body.new_organization_name)
 
     # 3. Admin Credentials Update (Email/Pass)
     if body.email or body.password:
@@ -72,10 +125,10 @@ async def update_org(
         # Using a helper in OrgService or direct repo call?
         # Let's keep it clean and use OrgService or MasterRepo.
         # But we need to hash password if present.
-        from app.core.security import get_password_hash
+        from app.core.security import get_password_hash_async
         from app.db.master_repo import master_repo
         
-        pwd_hash = get_password_hash(body.password) if body.password else None
+        pwd_hash = await get_password_hash_async(body.password) if body.password else None
         await master_repo.update_admin_credentials(
             target_org.admin_user_id,
             email=body.email,
@@ -83,17 +136,39 @@ async def update_org(
         )
 
     # 4. Return Updated Org
+    if job_id:
+        # Rename still running: report the org under its current name
+        response.status_code = status.HTTP_202_ACCEPTED
+        updated_org = await OrgService.get_organization(body.organization_name)
+        return OrgRenameScheduledResponse(message="Organization rename scheduled", job_id=job_id, organization=updated_org)
+
     # Fetch fresh
     final_name = body.new_organization_name if body.new_organization_name else body.organization_name
     updated_org = await OrgService.get_organization(final_name)
-    
-    return {"ok": True, "message": "Organization updated", "organization": updated_org}
 
+    return OrgUpdateResponse(message="Organization updated", organization=updated_org)
 
-@router.delete("/delete", response_model=dict)
+
+@router.delete("/delete", response_model=OrgDeleteResponse)
 async def delete_org(
     body: OrgDeleteRequest,
     current_admin: Annotated[TokenData, Depends(get_current_admin)]
 ):
     result = await OrgService.delete_organization(body.organization_name, current_admin.org_id)
     return result
+
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(
+    current_admin: Annotated[TokenData, Depends(get_current_admin)],
+    limit: int = 20
+):
+    return await JobService.list_jobs(current_admin.org_id, min(max(limit, 1), 100))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    return await JobService.get_job(job_id, current_admin.org_id)
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+from app.schemas.auth_schema import TokenData
+from app.api.orgs import get_current_admin
+from app.core.responses import FastJSONResponse
+from app.schemas.tenant_data_schema import TenantDocumentsCreateRequest, TenantDocumentUpdateRequest, TenantQueryRequest
+from app.services.tenant_data_service import TRANSFER_FORMATS, TenantDataService
+
+router = APIRouter(prefix="/org", tags=["Tenant Data"])
+
+@router.get("/{organization_name}/export")
+async def export_tenant(
+    organization_name: str,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)],
+    format: str = "ndjson"
+):
+    # ndjson is Extended JSON, one document per line; bson is the raw
+    # mongodump layout and round-trips every type exactly
+    fmt = TenantDataService.check_format(format)
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    return StreamingResponse(
+        TenantDataService.export_documents(org, fmt),
+        media_type=TRANSFER_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{organization_name}.{fmt}"'}
+    )
+
+@router.post("/{organization_name}/import", response_model=dict)
+async def import_tenant(
+    organization_name: str,
+    request: Request,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)],
+    format: str = "ndjson",
+    skip_duplicates: bool = True
+):
+    fmt = TenantDataService.check_format(format)
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    stats = await TenantDataService.import_documents(org, request.stream(), fmt, skip_duplicates)
+    return {"ok": True, **stats}
+
+@router.post("/{organization_name}/documents", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_documents(
+    organization_name: str,
+    body: TenantDocumentsCreateRequest,
+    response: Response,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    result = await TenantDataService.insert_documents(org, body.documents)
+    if result["errors"]:
+        # Some documents failed; each error carries its own status code
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return {"ok": not result["errors"], **result}
+
+@router.post("/{organization_name}/documents/query")
+async def query_documents(
+    organization_name: str,
+    body: TenantQueryRequest,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    if body.stream:
+        return StreamingResponse(TenantDataService.stream_documents(org, body), media_type=TRANSFER_FORMATS["ndjson"])
+    page = await TenantDataService.query_documents(org, body)
+    # Documents are already Extended JSON; skip jsonable_encoder's walk
+    return FastJSONResponse({"ok": True, **page})
+
+@router.get("/{organization_name}/documents/{doc_id}", response_model=dict)
+async def get_document(
+    organization_name: str,
+    doc_id: str,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    return {"ok": True, "document": await TenantDataService.get_document(org, doc_id)}
+
+@router.patch("/{organization_name}/documents/{doc_id}", response_model=dict)
+async def update_document(
+    organization_name: str,
+    doc_id: str,
+    body: TenantDocumentUpdateRequest,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    document = await TenantDataService.update_document(org, doc_id, body.set, body.unset)
+    return {"ok": True, "document": document}
+
+@router.delete("/{organization_name}/documents/{doc_id}", response_model=dict)
+async def delete_document(
+    organization_name: str,
+    doc_id: str,
+    current_admin: Annotated[TokenData, Depends(get_current_admin)]
+):
+    org = await TenantDataService.get_authorized_org(organization_name, current_admin.org_id)
+    await TenantDataService.delete_document(org, doc_id)
+    return {"ok": True}
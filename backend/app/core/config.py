@@ -1,13 +1,119 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     MONGO_URI: str
+    # Connection pool, per process: size it as workers x expected concurrent
+    # queries. Options also given in MONGO_URI are overridden by these.
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_CONNECTING: int = 2
+    MONGO_MAX_IDLE_TIME_MS: int = 0  # 0 = keep idle connections
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 0  # 0 = wait for a connection as long as the query timeout allows
+    MONGO_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib"; empty = no compression
+    MONGO_READ_PREFERENCE: str = "primary"
     MASTER_DB_NAME: str = "master_db"
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRES_MINUTES: int = 60
+    # Verified token payloads kept in memory; 0 disables the cache
+    TOKEN_CACHE_SIZE: int = 10000
+    # Operator credentials for /ops, sent as "X-Ops-Token"; none = /ops closed.
+    # Separate from admin JWTs, which only ever speak for one tenant.
+    OPS_TOKENS: List[str] = []
     SALT_ROUNDS: int = 12
+
+    # Password hashing runs on a bounded pool so bcrypt never blocks the loop
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = one per CPU
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # When set, startup picks the highest bcrypt cost within this budget
+    # (clamped to the min/max below) instead of SALT_ROUNDS
+    PASSWORD_HASH_TARGET_MS: int = 0
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 16
+
+    # Rename migrations
+    MIGRATION_BATCH_SIZE: int = 1000
+    MIGRATION_CONCURRENCY: int = 4
+    MIGRATION_STRATEGY: str = "auto"  # "auto", "rename", "merge", "streaming" or "buffered"
+    MIGRATION_BUFFERED_MAX_DOCS: int = 10000
+
+    # Tenant placement. Clusters map a name to a URI ("default" may be left
+    # out or empty to mean MONGO_URI); every cluster gets each database.
+    TENANT_CLUSTERS: Dict[str, str] = {}
+    TENANT_DATABASES: List[str] = []  # empty = MASTER_DB_NAME
+    TENANT_PLACEMENT: str = "hash"  # "hash" or "least_loaded"
+    # A moving tenant's writes are refused from ORG_CACHE_TTL_SECONDS plus
+    # this long before the copy starts, so every process has seen the fence
+    TENANT_MOVE_FENCE_GRACE_SECONDS: float = 5.0
+
+    # Tenant export/import
+    TENANT_TRANSFER_BATCH_SIZE: int = 1000  # documents per cursor batch / insert_many
+    TENANT_TRANSFER_CHUNK_BYTES: int = 256 * 1024  # export response chunk size
+    TENANT_IMPORT_BATCH_BYTES: int = 8 * 1024 * 1024
+    TENANT_IMPORT_CONCURRENCY: int = 2  # insert_many batches in flight
+    # Tenant document queries
+    TENANT_QUERY_MAX_TIME_MS: int = 5000  # per query page; streamed queries get no limit
+
+    # Tenant index template rollout (per process running the job)
+    TENANT_INDEX_ROLLOUT_CONCURRENCY: int = 2
+    TENANT_INDEX_ROLLOUT_PAUSE_SECONDS: float = 0.5  # after each tenant that needed a build
+
+    # Warm pool of pre-created tenant collections, per placement target.
+    # Refilled up to TENANT_POOL_SIZE once a target drops below the low-water
+    # mark; 0 disables the pool and signups create their collection inline.
+    TENANT_POOL_LOW_WATER: int = 0
+    TENANT_POOL_SIZE: int = 20
+    TENANT_POOL_CHECK_INTERVAL_SECONDS: float = 30.0
+
+    # Org metadata cache (per process; other workers may serve a stale
+    # entry for up to the TTL after a write)
+    ORG_CACHE_SIZE: int = 10000
+    ORG_CACHE_TTL_SECONDS: float = 30.0
+    ORG_CACHE_NEGATIVE_TTL_SECONDS: float = 5.0
+
+    # Org + admin metadata writes: "auto" uses a transaction when the master
+    # cluster supports one, "sequential" writes both with a compensating delete
+    ORG_PROVISIONING_MODE: str = "auto"  # "auto", "transaction" or "sequential"
+
+    # DELETE /org/delete: "soft" marks the org deleted and leaves the data to
+    # the background reaper; "immediate" removes everything in the request
+    ORG_DELETE_MODE: str = "soft"  # "soft" or "immediate"
+    ORG_REAPER_CONCURRENCY: int = 2  # per process
+    ORG_REAPER_PAUSE_SECONDS: float = 1.0  # per reaper worker, after each purged org
+    ORG_REAPER_POLL_INTERVAL_SECONDS: float = 30.0
+    ORG_REAPER_LEASE_SECONDS: int = 600
+
+    # POST /org/bulk-create
+    ORG_BULK_CREATE_MAX_ITEMS: int = 1000
+    ORG_BULK_COLLECTION_CONCURRENCY: int = 16
+
+    # Logging: written to stdout by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}  # per logger, e.g. {"app.services.org_service": "DEBUG"}
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited on
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # per event, e.g. {"org_created": 0.01}
+
+    # Request and MongoDB command latency at /metrics (per process)
+    METRICS_ENABLED: bool = True
+
+    # Per-request cProfile (off unless enabled): requests sending
+    # "X-Profile: 1" with an operator X-Ops-Token, plus a random share of all traffic
+    PROFILING_ENABLED: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0  # 0.0 - 1.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50  # oldest profiles are deleted beyond this
+
+    # Build declared master-DB indexes in the background on startup
+    MASTER_INDEXES_AUTO_CREATE: bool = True
+
+    # Background jobs
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 5.0
+    JOB_LEASE_SECONDS: int = 60
+    JOB_MAX_ATTEMPTS: int = 3
     
     model_config = SettingsConfigDict(env_file=".env", env_ignore_empty=True, extra="ignore")
 
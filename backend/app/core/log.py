@@ -0,0 +1,155 @@
+from app.core.config import settings
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+
+# Set per request by RequestIdMiddleware (and per job by the job runner);
+# every record logged while handling it carries the id
+request_id: ContextVar = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+# LogRecord attributes that aren't structured fields of their own
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "event"}
+
+_listener: QueueListener = None
+_handler: "_DroppingQueueHandler" = None
+
+
+class _ContextFilter(logging.Filter):
+    # Runs on the caller's side of the queue, where the context is still set
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    # High-volume events are kept at their LOG_SAMPLE_RATES rate, e.g.
+    # logger.info("Created org %s", org_id, extra={"event": "org_created"})
+    def __init__(self):
+        super().__init__()
+        self.sampled_out = 0
+
+    def filter(self, record):
+        rate = settings.LOG_SAMPLE_RATES.get(getattr(record, "event", None))
+        if rate is None or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class _DroppingQueueHandler(QueueHandler):
+    # A full queue drops the record rather than blocking the event loop
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only what can't cross the thread boundary: args merged into the
+        # message, the traceback rendered; formatting is the writer's job
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in ("event", "request_id"):
+            if getattr(record, field, None):
+                entry[field] = getattr(record, field)
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    # Records are formatted and written by a background thread; callers
+    # only pay for building the record and a non-blocking put
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    _handler = _DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _handler.addFilter(_SamplingFilter())
+    _handler.addFilter(_ContextFilter())
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(_handler.queue, output)
+    _listener.start()
+
+
+def shutdown_logging():
+    # Flushes whatever is still queued
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_handler)
+    _listener, _handler = None, None
+
+
+def logging_stats() -> dict:
+    if _handler is None:
+        return {"configured": False}
+    sampling = next(f for f in _handler.filters if isinstance(f, _SamplingFilter))
+    return {
+        "configured": True,
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "sampled_out": sampling.sampled_out,
+    }
+
+
+class RequestIdMiddleware:
+    # Takes the caller's X-Request-ID (or makes one up) and echoes it back
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64]
+        value = incoming or uuid.uuid4().hex
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, value.encode("latin-1"))]
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
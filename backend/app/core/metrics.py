@@ -0,0 +1,156 @@
+from bisect import bisect_left
+import threading
+import time
+
+# Seconds; from cache hits up to tenant drops and exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every metric created in this process, in /metrics order
+REGISTRY: list = []
+
+
+class _Metric:
+    # Each thread records into its own shard, so recording takes no lock:
+    # the event loop and the driver's threads never contend. A scrape sums
+    # the shards and may miss an update that is still in flight.
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: list = []
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Shards outlive their thread so counts never go backwards
+            self._shards.append(shard)
+        return shard
+
+    def _merged(self) -> dict:
+        # dict.copy() is a single step under the GIL, so a shard can't
+        # change size while it is being read
+        merged = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                merged[labels] = merged[labels] + value if labels in merged else value
+        return merged
+
+    def samples(self) -> list:
+        return [("", dict(zip(self.labelnames, labels)), value) for labels, value in sorted(self._merged().items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class _HistogramValue(list):
+    # Per-bucket (not cumulative) counts, the +Inf bucket, then the sum
+    def __add__(self, other):
+        return _HistogramValue(a + b for a, b in zip(self, other))
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: tuple, value: float):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            entry = shard[labels] = _HistogramValue([0] * (len(self.buckets) + 2))
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def samples(self) -> list:
+        samples = []
+        for labels, entry in sorted(self._merged().items()):
+            labels = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry):
+                cumulative += count
+                samples.append(("_bucket", {**labels, "le": str(bound)}, cumulative))
+            samples.append(("_sum", labels, entry[-1]))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_family(name: str, kind: str, documentation: str, samples: list) -> str:
+    # samples are (name suffix, labels, value)
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def render() -> str:
+    # Prometheus text exposition format, version 0.0.4
+    return "".join(render_family(m.name, m.kind, m.documentation, m.samples()) for m in REGISTRY)
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies", ("method", "route")
+)
+http_requests = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+# Requests are only matched to a route once dispatched, so in-flight is per method
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled", ("method",))
+
+
+def _route_template(scope) -> str:
+    # The router leaves the matched route in the scope. Its path
+    # ("/org/{organization_name}/documents/{document_id}") rather than the
+    # raw URL keeps the label count fixed.
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware; BaseHTTPMiddleware would add a task and a body
+    # copy to every request
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            labels = (method, _route_template(scope))
+            http_request_duration.observe(labels, time.perf_counter() - started)
+            http_requests.inc(labels + (str(status_code),))
+            http_requests_in_flight.dec((method,))
@@ -0,0 +1,139 @@
+from app.core.config import settings
+from app.core.security import is_operator_token
+from datetime import datetime
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+OPS_TOKEN_HEADER = b"x-ops-token"
+
+# Profile files are named <timestamp>-<method>-<route>.prof, with a .json
+# sidecar holding the request details
+_NAME_PATTERN = re.compile(r"^[0-9T]+-[A-Z]+-[a-z0-9_]*$")
+
+# cProfile hooks the whole thread, so only one request per process is
+# profiled at a time; requests that arrive meanwhile run unprofiled
+_active = False
+
+
+def _profile_requested(scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+        return False
+    # Only operators can ask for a profile (it costs the request some speed)
+    return is_operator_token(headers.get(OPS_TOKEN_HEADER, b"").decode("latin-1"))
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", route.lower()).strip("_")
+
+
+def _write_profile(profiler: cProfile.Profile, details: dict):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{details['method']}-{_slug(details['route'])}"
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, f"{name}.prof"))
+    with open(os.path.join(settings.PROFILE_DIR, f"{name}.json"), "w") as f:
+        json.dump(details, f)
+    # Keep the newest PROFILE_MAX_FILES profiles
+    for stale in _profile_names()[settings.PROFILE_MAX_FILES:]:
+        for extension in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, stale + extension))
+            except FileNotFoundError:
+                pass
+
+
+def _profile_names() -> list:
+    # Newest first; names start with the timestamp
+    try:
+        files = os.listdir(settings.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted((f[:-5] for f in files if f.endswith(".prof")), reverse=True)
+
+
+def list_profiles() -> list:
+    profiles = []
+    for name in _profile_names():
+        try:
+            with open(os.path.join(settings.PROFILE_DIR, f"{name}.json")) as f:
+                details = json.load(f)
+        except (FileNotFoundError, ValueError):
+            details = {}
+        profiles.append({"name": name, **details})
+    return profiles
+
+
+def profile_report(name: str, limit: int = 40, app_only: bool = True) -> str:
+    # pstats text sorted by cumulative time; app_only keeps the frames from
+    # this code base (handlers, services, repositories)
+    if not _NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{name}.prof")
+    if not os.path.exists(path):
+        return None
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out).sort_stats("cumulative")
+    restrictions = [r"[/\\]app[/\\]", limit] if app_only else [limit]
+    stats.print_stats(*restrictions)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    # Profiles requests that send "X-Profile: 1" with an operator X-Ops-Token,
+    # plus a PROFILE_SAMPLE_RATE share of all requests. Everything else costs one
+    # header lookup. Awaited work that runs elsewhere (bcrypt in the hash
+    # pool, the server side of Mongo calls) shows up as time in the event
+    # loop's select(); the sidecar has the request's wall time. Requests
+    # running concurrently on the loop land in the same profile.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _active
+        if scope["type"] != "http" or _active or not (
+            (settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE)
+            or _profile_requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _active = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler.disable()
+            _active = False
+            details = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None) or "unmatched",
+                "status": status_code,
+                "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            try:
+                await asyncio.to_thread(_write_profile, profiler, details)
+            except OSError as e:
+                logger.warning("Failed to write profile for %s: %s", details["path"], e)
@@ -0,0 +1,23 @@
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+import orjson
+
+
+def _default(value):
+    # What orjson can't encode itself: models nested in hand-built dicts
+    # and ObjectIds that weren't stringified
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    # For handlers returning large untyped payloads (pages of documents or
+    # projected orgs). Returned directly, it skips FastAPI's response
+    # validation and jsonable_encoder; orjson then writes the bytes.
+    # Typed response models don't need it: FastAPI already dumps those
+    # straight to JSON, and a custom response_class would turn that off.
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,9 +1,21 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from collections import Counter
+import asyncio
+import hashlib
+import hmac
+import os
+import time
 import jwt
 from jwt.exceptions import PyJWTError
 import bcrypt
 from app.core.config import settings
+from app.core.cache import TTLCache, MISSING
+
+
+class PasswordHasherBusy(Exception):
+    pass
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
@@ -11,11 +23,115 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         hashed_password.encode('utf-8')
     )
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: int = None) -> str:
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt(rounds=settings.SALT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=rounds or settings.SALT_ROUNDS)
     return bcrypt.hashpw(pwd_bytes, salt).decode('utf-8')
 
+# bcrypt releases the GIL, so a thread pool scales across cores; a process
+# pool is available for deployments that want hard isolation.
+_hash_executor: Executor = None
+_hash_pending = 0
+
+def hash_pool_size() -> int:
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        workers = hash_pool_size()
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+async def _run_hash_job(fn, *args):
+    # Fail fast instead of queueing unbounded work behind a saturated pool
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_job(get_password_hash, password, get_salt_rounds())
+
+# Cost factor chosen by calibrate_salt_rounds(); SALT_ROUNDS until then
+_calibrated_rounds: int = None
+_calibration: dict = {}
+# Costs of hashes seen at login, and how many were upgraded
+hash_cost_counts: Counter = Counter()
+rehash_count = 0
+
+def get_salt_rounds() -> int:
+    return _calibrated_rounds or settings.SALT_ROUNDS
+
+def get_hash_cost(hashed_password: str) -> int:
+    # bcrypt hashes look like $2b$<cost>$<salt+digest>
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed_password: str) -> bool:
+    # Upgrade only: the cost is calibrated per process, so workers may
+    # disagree, and none of them should weaken a stronger hash
+    return get_hash_cost(hashed_password) < get_salt_rounds()
+
+def record_login_hash_cost(hashed_password: str, rehashed: bool = False):
+    global rehash_count
+    hash_cost_counts[get_hash_cost(hashed_password)] += 1
+    if rehashed:
+        rehash_count += 1
+
+def calibrate_salt_rounds(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    # Each extra round doubles the cost, so stop at the first one over budget;
+    # the whole probe costs roughly twice the target.
+    global _calibrated_rounds, _calibration
+    chosen, timings = min_rounds, {}
+    for rounds in range(min_rounds, max_rounds + 1):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        timings[rounds] = round((time.perf_counter() - started) * 1000, 1)
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    _calibrated_rounds = chosen
+    _calibration = {"target_ms": target_ms, "timings_ms": timings}
+    return chosen
+
+async def calibrate_salt_rounds_async() -> int:
+    # Runs on a plain thread so calibration never queues behind logins
+    return await asyncio.to_thread(
+        calibrate_salt_rounds,
+        settings.PASSWORD_HASH_TARGET_MS,
+        settings.PASSWORD_HASH_MIN_ROUNDS,
+        settings.PASSWORD_HASH_MAX_ROUNDS,
+    )
+
+def password_hashing_stats() -> dict:
+    return {
+        "active_rounds": get_salt_rounds(),
+        "calibrated": _calibrated_rounds is not None,
+        "calibration": _calibration,
+        "login_hash_costs": {str(cost): count for cost, count in sorted(hash_cost_counts.items())},
+        "rehashed_on_login": rehash_count,
+    }
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -23,8 +139,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_EXPIRES_MINUTES)
     
-    # PyJWT expects 'exp' to be numeric or datetime
-    to_encode.update({"exp": expire})
+    # PyJWT expects 'exp' to be numeric or datetime; 'iat' stays a float so
+    # revocations in the same second as a new login are told apart
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -34,3 +151,44 @@ def decode_access_token(token: str) -> dict:
         return payload
     except PyJWTError:
         return None
+
+# Verified payloads keyed by the token's SHA-256 digest. Entries never
+# outlive the token's own 'exp'. Revocations are per process.
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.JWT_EXPIRES_MINUTES * 60)
+# sub -> time of revocation; tokens issued before it are rejected
+_revoked_subjects: dict = {}
+
+def _is_revoked(payload: dict) -> bool:
+    revoked_at = _revoked_subjects.get(payload.get("sub"))
+    return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+def decode_access_token_cached(token: str) -> dict:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(key)
+    if payload is MISSING:
+        payload = decode_access_token(token)
+        if not payload or _is_revoked(payload):
+            return None
+        remaining = payload["exp"] - time.time()
+        if remaining > 0:
+            token_cache.set(key, payload, ttl=min(remaining, token_cache.ttl))
+        return payload
+    if _is_revoked(payload):
+        return None
+    return payload
+
+def is_operator_token(token: str) -> bool:
+    # Constant-time against every configured token
+    if not token:
+        return False
+    candidate = token.encode("utf-8")
+    return any(hmac.compare_digest(candidate, ops.encode("utf-8")) for ops in settings.OPS_TOKENS)
+
+def revoke_subject_tokens(sub: str):
+    now = time.time()
+    # Anything revoked longer ago than a token's lifetime has expired anyway
+    horizon = now - settings.JWT_EXPIRES_MINUTES * 60
+    for stale in [s for s, at in _revoked_subjects.items() if at < horizon]:
+        del _revoked_subjects[stale]
+    _revoked_subjects[sub] = now
+    token_cache.invalidate_where(lambda key, payload: payload.get("sub") == sub)
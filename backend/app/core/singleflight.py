@@ -0,0 +1,33 @@
+import asyncio
+
+
+class SingleFlight:
+    # Collapses concurrent calls for the same key into one in-flight task.
+    # Every waiter gets that task's result or exception; the key is released
+    # as soon as the task finishes, so later calls start a fresh lookup.
+    def __init__(self):
+        self._calls: dict = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self.shared += 1
+        # Shielded so one cancelled waiter doesn't cancel the lookup for the rest
+        return await asyncio.shield(task)
+
+    def _release(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
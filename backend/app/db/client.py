@@ -1,30 +1,77 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.db.monitoring import command_metrics, pool_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _client_options() -> dict:
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxConnecting": settings.MONGO_MAX_CONNECTING,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "event_listeners": [pool_stats],
+    }
+    if settings.METRICS_ENABLED:
+        options["event_listeners"].append(command_metrics)
+    if settings.MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
 
 class MongoDBClient:
-    def __init__(self):
+    def __init__(self, uri: str = None):
+        # Defaults to the master cluster; tenant clusters get their own instance
+        self.uri = uri
         self.client: AsyncIOMotorClient = None
+        self.capabilities: dict = None
 
     def connect(self):
         if not self.client:
-            self.client = AsyncIOMotorClient(settings.MONGO_URI)
-            print("Connected to MongoDB")
+            self.client = AsyncIOMotorClient(self.uri or settings.MONGO_URI, **_client_options())
+            logger.info("Connected to MongoDB")
 
     def close(self):
         if self.client:
             self.client.close()
-            print("Closed MongoDB connection")
+            self.client = None
+            self.capabilities = None
+            logger.info("Closed MongoDB connection")
 
     def get_database(self, db_name: str = None):
         if db_name:
             return self.client[db_name]
         return self.client[settings.MASTER_DB_NAME]
 
+    async def get_capabilities(self) -> dict:
+        # Probed once per connection; strategies may later flip flags off
+        # when the server rejects them at runtime.
+        if self.capabilities is None:
+            hello = await self.client.admin.command("hello")
+            build_info = await self.client.admin.command("buildInfo")
+            self.capabilities = {
+                "version": tuple(build_info.get("versionArray", [0])[:3]),
+                "replica_set": "setName" in hello,
+                "sharded": hello.get("msg") == "isdbgrid",
+            }
+        return self.capabilities
+
 db_client = MongoDBClient()
 
 async def get_master_db():
     return db_client.get_database(settings.MASTER_DB_NAME)
 
-async def get_tenant_collection_name(org_name: str) -> str:
-    # Safely format collection name
-    return f"org_{org_name.lower().replace(' ', '_')}"
+async def get_tenant_storage_key(org_id: str) -> str:
+    # Immutable physical collection name, assigned once from the org's _id.
+    # Renames never touch it.
+    return f"org_{org_id}"
+
+def supports_transactions(capabilities: dict) -> bool:
+    version = capabilities.get("version", (0,))
+    if capabilities.get("sharded"):
+        return version >= (4, 2)
+    return capabilities.get("replica_set", False) and version >= (4, 0)
@@ -0,0 +1,138 @@
+from app.db.client import get_master_db
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes the master DB relies on, per collection. Names are part of the
+# declaration so the report can match them against what exists.
+MASTER_INDEXES = {
+    "organizations": [
+        IndexModel([("organization_name", ASCENDING)], name="organization_name_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+        # Only soft-deleted orgs carry deleted_at; the reaper's queue
+        IndexModel(
+            [("deleted_at", ASCENDING)], name="deleted_at",
+            partialFilterExpression={"deleted_at": {"$exists": True}}
+        ),
+    ],
+    "admins": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("organization_id", ASCENDING)], name="organization_id"),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        IndexModel([("organization_id", ASCENDING), ("created_at", DESCENDING)], name="organization_id_created_at"),
+    ],
+    "tenant_pool": [
+        IndexModel([("cluster", ASCENDING), ("db_name", ASCENDING), ("_id", ASCENDING)], name="cluster_db_name_id"),
+    ],
+    "migrations": [
+        IndexModel(
+            [("org_id", ASCENDING), ("source", ASCENDING), ("target", ASCENDING), ("status", ASCENDING)],
+            name="org_source_target_status"
+        ),
+    ],
+}
+
+_bootstrap_task: asyncio.Task = None
+
+# "collection.index" names this process has confirmed exist
+_ready: set = set()
+
+
+def _key_pattern(index: dict) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in index["key"].items())
+
+
+async def ensure_master_indexes() -> dict:
+    # create_indexes is a no-op for indexes that already exist with the same
+    # spec, so this is safe to run on every start. Failures (e.g. duplicate
+    # values blocking a unique index) are reported, not raised.
+    db = await get_master_db()
+    results = {}
+    for collection_name, models in MASTER_INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                await db[collection_name].create_indexes([model])
+                results[f"{collection_name}.{name}"] = "ok"
+                _ready.add(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                results[f"{collection_name}.{name}"] = f"failed: {e}"
+                logger.warning("Failed to create index %s.%s: %s", collection_name, name, e)
+    return results
+
+
+def is_index_ready(collection_name: str, name: str) -> bool:
+    # Callers that rely on a unique index for correctness check this and
+    # keep their own guard until the index is known to be in place
+    return f"{collection_name}.{name}" in _ready
+
+
+def start_index_bootstrap():
+    # Index builds can take a while on large collections; don't block startup
+    global _bootstrap_task
+    if _bootstrap_task is None or _bootstrap_task.done():
+        _bootstrap_task = asyncio.create_task(ensure_master_indexes())
+    return _bootstrap_task
+
+
+async def stop_index_bootstrap():
+    global _bootstrap_task
+    if _bootstrap_task is not None and not _bootstrap_task.done():
+        _bootstrap_task.cancel()
+        await asyncio.gather(_bootstrap_task, return_exceptions=True)
+    _bootstrap_task = None
+
+
+async def index_report() -> dict:
+    # Per collection: declared indexes that are missing, existing indexes
+    # nobody declared, and existing indexes with no recorded use.
+    db = await get_master_db()
+    report = {}
+    for collection_name, models in MASTER_INDEXES.items():
+        collection = db[collection_name]
+        existing = {}
+        async for index in collection.list_indexes():
+            existing[index["name"]] = index
+
+        usage = {}
+        try:
+            async for stat in collection.aggregate([{"$indexStats": {}}]):
+                usage[stat["name"]] = {"ops": stat["accesses"]["ops"], "since": stat["accesses"]["since"]}
+        except OperationFailure as e:
+            # $indexStats needs clusterMonitor-level privileges on some deployments
+            usage = None
+            logger.debug("$indexStats unavailable for %s: %s", collection_name, e)
+
+        existing_patterns = {_key_pattern(index): name for name, index in existing.items()}
+        declared_patterns = set()
+        missing = []
+        for model in models:
+            pattern = _key_pattern(model.document)
+            declared_patterns.add(pattern)
+            if pattern not in existing_patterns:
+                missing.append(model.document["name"])
+            elif model.document.get("unique") and not existing[existing_patterns[pattern]].get("unique"):
+                missing.append(f"{model.document['name']} (exists without unique)")
+
+        undeclared = [
+            name for name, index in existing.items()
+            if name != "_id_" and _key_pattern(index) not in declared_patterns
+        ]
+        unused = None
+        if usage is not None:
+            unused = [name for name in existing if name != "_id_" and usage.get(name, {}).get("ops", 0) == 0]
+
+        report[collection_name] = {
+            "existing": sorted(existing),
+            "missing": missing,
+            "undeclared": undeclared,
+            "unused": unused,
+            "usage": usage,
+        }
+    return report
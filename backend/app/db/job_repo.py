@@ -0,0 +1,100 @@
+from app.db.client import get_master_db
+from pymongo import ReturnDocument
+from bson import ObjectId
+from datetime import datetime, timedelta
+
+ACTIVE_JOB_STATUSES = ["queued", "running"]
+
+
+class JobRepository:
+    @staticmethod
+    async def create_job(job_data: dict) -> str:
+        db = await get_master_db()
+        result = await db.jobs.insert_one(job_data)
+        return str(result.inserted_id)
+
+    @staticmethod
+    async def get_job(job_id: str):
+        if not ObjectId.is_valid(job_id):
+            return None
+        db = await get_master_db()
+        return await db.jobs.find_one({"_id": ObjectId(job_id)})
+
+    @staticmethod
+    async def list_jobs_by_org_id(org_id: str, limit: int = 20):
+        db = await get_master_db()
+        cursor = db.jobs.find({"organization_id": ObjectId(org_id)}).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @staticmethod
+    async def get_active_job(org_id: str, job_type: str):
+        db = await get_master_db()
+        return await db.jobs.find_one({
+            # None for jobs that span every organization
+            "organization_id": ObjectId(org_id) if org_id else None,
+            "type": job_type,
+            "status": {"$in": ACTIVE_JOB_STATUSES}
+        })
+
+    @staticmethod
+    async def claim_next_job(owner: str, lease_seconds: int, max_attempts: int):
+        # Queued jobs, plus running jobs whose worker died without releasing them
+        db = await get_master_db()
+        now = datetime.utcnow()
+        # A job that keeps taking its worker down (or outliving its lease)
+        # fails once it has used up its attempts instead of being retried forever
+        await db.jobs.update_many(
+            {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": max_attempts}},
+            {"$set": {
+                "status": "failed",
+                "error": "Lease expired on the final attempt",
+                "owner": None,
+                "lease_expires_at": None,
+                "finished_at": now,
+                "updated_at": now,
+            }}
+        )
+        return await db.jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$lt": max_attempts}},
+            ]},
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": owner,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def update_job(job_id, update_data: dict):
+        db = await get_master_db()
+        update_data = {**update_data, "updated_at": datetime.utcnow()}
+        await db.jobs.update_one({"_id": ObjectId(job_id)}, {"$set": update_data})
+
+    @staticmethod
+    async def renew_lease(job_id, owner: str, lease_seconds: int):
+        db = await get_master_db()
+        await db.jobs.update_one(
+            {"_id": ObjectId(job_id), "owner": owner, "status": "running"},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+        )
+
+    @staticmethod
+    async def release_jobs(owner: str):
+        # Hand running jobs back to the queue on graceful shutdown
+        db = await get_master_db()
+        await db.jobs.update_many(
+            {"owner": owner, "status": "running"},
+            {"$set": {"status": "queued", "owner": None, "lease_expires_at": None, "updated_at": datetime.utcnow()}}
+        )
+
+
+job_repo = JobRepository()
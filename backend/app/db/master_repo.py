@@ -1,54 +1,268 @@
 from app.db.client import get_master_db
 from app.models.admin import AdminInDB
-from app.core.security import verify_password
+from app.core.security import verify_password, revoke_subject_tokens
+from app.core.cache import TTLCache, MISSING
+from app.core.singleflight import SingleFlight
+from app.core.config import settings
 from bson import ObjectId
-from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Org documents keyed by ("id", org_id) and ("name", organization_name).
+# A cached None is a negative entry for an org that doesn't exist.
+# Cached documents are shared between callers and must not be mutated.
+org_cache = TTLCache(settings.ORG_CACHE_SIZE, settings.ORG_CACHE_TTL_SECONDS)
+
+# Concurrent identical reads share one round trip
+lookups = SingleFlight()
 
 
 class MasterRepository:
     @staticmethod
     async def get_admin_by_email(email: str):
         db = await get_master_db()
-        return await db.admins.find_one({"email": email})
+        return await lookups.do(("admin_email", email), lambda: db.admins.find_one({"email": email}))
 
     @staticmethod
     async def get_org_by_id(org_id: str):
+        key = ("id", org_id)
+        cached = org_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        generation = org_cache.generation
         db = await get_master_db()
-        return await db.organizations.find_one({"_id": ObjectId(org_id)})
+        # Keyed by generation too: reads issued after a write never join a
+        # lookup that started before it
+        org = await lookups.do((key, generation), lambda: db.organizations.find_one(
+            {"_id": ObjectId(org_id), "deleted_at": None}
+        ))
+        MasterRepository._cache_org(key, org, generation)
+        return org
     
     @staticmethod
     async def get_org_by_name(name: str):
+        key = ("name", name)
+        cached = org_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        generation = org_cache.generation
         db = await get_master_db()
-        return await db.organizations.find_one({"organization_name": name})
+        org = await lookups.do((key, generation), lambda: db.organizations.find_one(
+            {"organization_name": name, "deleted_at": None}
+        ))
+        MasterRepository._cache_org(key, org, generation)
+        return org
 
     @staticmethod
-    async def create_org(org_data: dict) -> str:
+    async def list_orgs(limit: int, order: str = "created_at", after: tuple = None, name_prefix: str = None,
+                        created_after: datetime = None, created_before: datetime = None, projection: dict = None) -> list:
+        # Keyset pagination: "after" is the sort key of the last row already
+        # returned, so every page is an index seek, whatever its depth.
+        # order "organization_name" walks organization_name_unique (and serves
+        # name prefixes); "created_at" walks created_at_id.
+        conditions = [{"deleted_at": None}]
+        if name_prefix:
+            # Names are [a-z0-9-], so the prefix maps to a plain index range
+            conditions.append({"organization_name": {
+                "$gte": name_prefix, "$lt": name_prefix[:-1] + chr(ord(name_prefix[-1]) + 1)
+            }})
+        created_range = {}
+        if created_after:
+            created_range["$gte"] = created_after
+        if created_before:
+            created_range["$lt"] = created_before
+        if created_range:
+            conditions.append({"created_at": created_range})
+
+        if order == "organization_name":
+            sort = [("organization_name", 1)]
+            if after:
+                conditions.append({"organization_name": {"$gt": after[0]}})
+        elif order == "_id":
+            sort = [("_id", 1)]
+            if after:
+                conditions.append({"_id": {"$gt": after[0]}})
+        else:
+            sort = [("created_at", 1), ("_id", 1)]
+            if after:
+                conditions.append({"$or": [
+                    {"created_at": {"$gt": after[0]}},
+                    {"created_at": after[0], "_id": {"$gt": after[1]}},
+                ]})
+
         db = await get_master_db()
-        result = await db.organizations.insert_one(org_data)
-        return str(result.inserted_id)
+        cursor = db.organizations.find({"$and": conditions}, projection, sort=sort, limit=limit)
+        return await cursor.to_list(length=limit)
 
     @staticmethod
-    async def create_admin(admin_data: dict) -> str:
+    async def count_orgs() -> int:
         db = await get_master_db()
-        result = await db.admins.insert_one(admin_data)
-        return str(result.inserted_id)
+        return await db.organizations.estimated_document_count()
 
     @staticmethod
-    async def update_org_admin_id(org_id: str, admin_id: str):
+    async def get_existing_org_names(names: list) -> set:
         db = await get_master_db()
-        print(f"DEBUG: Updating org {org_id} with admin {admin_id}")
-        result = await db.organizations.update_one(
-            {"_id": ObjectId(org_id)},
-            {"$set": {"admin_user_id": ObjectId(admin_id)}}
+        cursor = db.organizations.find({"organization_name": {"$in": names}}, {"organization_name": 1, "_id": 0})
+        return {org["organization_name"] async for org in cursor}
+
+    @staticmethod
+    def _cache_org(key, org, generation: int):
+        # Skipped by the cache if a write invalidated anything mid-read
+        if org is None:
+            org_cache.set(key, None, ttl=settings.ORG_CACHE_NEGATIVE_TTL_SECONDS, generation=generation)
+            return
+        org_cache.set(("id", str(org["_id"])), org, generation=generation)
+        org_cache.set(("name", org["organization_name"]), org, generation=generation)
+
+    @staticmethod
+    def invalidate_orgs(org_ids: list, names: list):
+        # One pass over the cache for a whole batch of writes
+        ids = set(org_ids)
+        keys = {("id", org_id) for org_id in ids} | {("name", name) for name in names if name}
+        org_cache.invalidate_where(
+            lambda key, org: key in keys or (org is not None and str(org["_id"]) in ids)
         )
-        print(f"DEBUG: Matched: {result.matched_count}, Modified: {result.modified_count}")
-        if result.matched_count == 0:
-            print(f"DEBUG: WARNING - No organization matched for update!")
+
+    @staticmethod
+    def invalidate_org(org_id: str, *names: str):
+        keys = {("id", org_id)} | {("name", name) for name in names if name}
+        org_cache.invalidate_where(
+            lambda key, org: key in keys or (org is not None and str(org["_id"]) == org_id)
+        )
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return {**org_cache.stats(), "coalescing": lookups.stats()}
+
+    @staticmethod
+    async def create_org_with_admin(org_data: dict, admin_data: dict, use_transaction: bool) -> str:
+        # Both documents carry client-generated _ids and the org already
+        # points at its admin, so no follow-up link update is needed.
+        db = await get_master_db()
+        if use_transaction:
+            async def write(session):
+                await db.organizations.insert_one(org_data, session=session)
+                await db.admins.insert_one(admin_data, session=session)
+
+            async with await db.client.start_session() as session:
+                await session.with_transaction(write)
+        else:
+            # Standalone servers: the unique indexes still reject duplicates,
+            # and a failed admin insert is compensated by removing the org
+            await db.organizations.insert_one(org_data)
+            try:
+                await db.admins.insert_one(admin_data)
+            except Exception:
+                await MasterRepository.delete_org(str(org_data["_id"]))
+                raise
+        MasterRepository.invalidate_org(str(org_data["_id"]), org_data.get("organization_name"))
+        return str(org_data["_id"])
+
+    @staticmethod
+    async def create_orgs_with_admins(org_docs: list, admin_docs: list) -> dict:
+        # Batched variant for bulk provisioning: two insert_many calls, with
+        # orgs whose admin insert failed removed again. Returns the write
+        # error for each position that was not created; any other failure
+        # removes the whole batch and is raised.
+        if not org_docs:
+            return {}
+        db = await get_master_db()
+        errors = {}
+        try:
+            try:
+                await db.organizations.insert_many(org_docs, ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get("writeErrors", []):
+                    errors[err["index"]] = err
+
+            positions = [i for i in range(len(org_docs)) if i not in errors]
+            if positions:
+                try:
+                    await db.admins.insert_many([admin_docs[i] for i in positions], ordered=False)
+                except BulkWriteError as e:
+                    orphaned = []
+                    for err in e.details.get("writeErrors", []):
+                        position = positions[err["index"]]
+                        errors[position] = err
+                        orphaned.append(org_docs[position]["_id"])
+                    if orphaned:
+                        await db.organizations.delete_many({"_id": {"$in": orphaned}})
+        except Exception:
+            # Anything else (network, timeout) leaves an unknown subset
+            # written; every _id is ours, so remove them all and fail the batch
+            try:
+                await db.admins.delete_many({"_id": {"$in": [doc["_id"] for doc in admin_docs]}})
+                await db.organizations.delete_many({"_id": {"$in": [doc["_id"] for doc in org_docs]}})
+            except Exception as cleanup_error:
+                logger.warning("Could not remove partially created orgs: %s", cleanup_error)
+            raise
+        finally:
+            MasterRepository.invalidate_orgs(
+                [str(doc["_id"]) for doc in org_docs],
+                [doc["organization_name"] for doc in org_docs]
+            )
+        return errors
 
     @staticmethod
     async def delete_org(org_id: str):
         db = await get_master_db()
         await db.organizations.delete_one({"_id": ObjectId(org_id)})
+        MasterRepository.invalidate_org(org_id)
+
+    @staticmethod
+    async def mark_org_deleted(org_id: str, name: str) -> bool:
+        # Soft delete: the org and its admins disappear from lookups and
+        # logins now, their tokens are revoked, and the org name and admin
+        # emails are freed for a new signup straight away.
+        # The reaper removes the data later (see claim_deleted_org).
+        db = await get_master_db()
+        now = datetime.utcnow()
+        result = await db.organizations.update_one(
+            {"_id": ObjectId(org_id), "deleted_at": None},
+            {"$set": {
+                "organization_name": f"{name}~deleted~{org_id}",
+                "deleted_name": name,
+                "deleted_at": now,
+                "updated_at": now,
+            }}
+        )
+        admins = await db.admins.find(
+            {"organization_id": ObjectId(org_id), "deleted_at": None}, {"email": 1}
+        ).to_list(None)
+        for admin in admins:
+            await db.admins.update_one({"_id": admin["_id"]}, {"$set": {
+                "email": f"{admin['email']}~deleted~{org_id}",
+                "deleted_email": admin["email"],
+                "deleted_at": now,
+            }})
+            revoke_subject_tokens(str(admin["_id"]))
+        MasterRepository.invalidate_org(org_id, name)
+        return result.modified_count == 1
+
+    @staticmethod
+    async def claim_deleted_org(owner: str, lease_seconds: int):
+        # Oldest deletion nobody holds a live lease on; a reaper that dies
+        # mid-purge lets its lease lapse and another one takes over
+        db = await get_master_db()
+        now = datetime.utcnow()
+        return await db.organizations.find_one_and_update(
+            {
+                "deleted_at": {"$ne": None},
+                "$or": [{"reap_lease_expires_at": None}, {"reap_lease_expires_at": {"$lt": now}}],
+            },
+            {"$set": {"reap_owner": owner, "reap_lease_expires_at": now + timedelta(seconds=lease_seconds)}},
+            sort=[("deleted_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def count_deleted_orgs() -> int:
+        db = await get_master_db()
+        return await db.organizations.count_documents({"deleted_at": {"$ne": None}})
 
     @staticmethod
     async def delete_admin(admin_id: str):
@@ -67,19 +281,39 @@ class MasterRepository:
             {"_id": ObjectId(org_id)},
             {"$set": update_data}
         )
+        # Also drops the old name, which is only reachable through the cached doc
+        MasterRepository.invalidate_org(org_id, update_data.get("organization_name"))
     
     @staticmethod
-    async def update_admin_credentials(admin_id: str, email: str = None, password_hash: str = None):
+    async def update_admin_credentials(admin_id: str, email: str = None, password_hash: str = None, expected_password_hash: str = None, revoke_tokens: bool = True):
         db = await get_master_db()
         update_fields = {"updated_at": datetime.utcnow()}
         if email:
             update_fields["email"] = email
         if password_hash:
             update_fields["password_hash"] = password_hash
+
+        query = {"_id": ObjectId(admin_id)}
+        if expected_password_hash:
+            # Compare-and-set, so a background rehash can't undo a password change
+            query["password_hash"] = expected_password_hash
             
         await db.admins.update_one(
-            {"_id": ObjectId(admin_id)},
+            query,
             {"$set": update_fields}
         )
+        if revoke_tokens and (email or password_hash):
+            # Tokens issued for the old credentials stop working immediately
+            revoke_subject_tokens(admin_id)
+
+    @staticmethod
+    async def count_admins_by_hash_cost() -> dict:
+        # bcrypt cost is the two digits after the "$2b$" prefix
+        db = await get_master_db()
+        pipeline = [
+            {"$group": {"_id": {"$substrBytes": ["$password_hash", 4, 2]}, "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ]
+        return {row["_id"]: row["count"] async for row in db.admins.aggregate(pipeline)}
 
 master_repo = MasterRepository()
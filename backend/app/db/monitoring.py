@@ -0,0 +1,215 @@
+from collections import deque
+from pymongo import monitoring
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, render_family
+import threading
+import time
+
+# Checkout waits kept per server for the percentile figures
+_WAIT_SAMPLES = 1024
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _ServerPoolStats:
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures: dict = {}
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_ms: deque = deque(maxlen=_WAIT_SAMPLES)
+        self.cleared = 0
+        self.last_cleared_at: float = None
+
+    def to_dict(self, max_pool_size: int) -> dict:
+        samples = list(self.wait_ms)
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "utilization": round(self.in_use / max_pool_size, 3) if max_pool_size else None,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkouts": self.checkouts,
+            "checkout_failures": dict(self.checkout_failures),
+            "wait_ms": {
+                "avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "p50": round(_percentile(samples, 50), 3) if samples else 0.0,
+                "p99": round(_percentile(samples, 99), 3) if samples else 0.0,
+                "max": round(self.wait_ms_max, 3),
+            },
+            "cleared": self.cleared,
+            "last_cleared_at": self.last_cleared_at,
+        }
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    # Aggregates connection pool events per server address. The driver calls
+    # listeners from its own threads, so every update happens under a lock.
+    def __init__(self, max_pool_size: int = 0):
+        self._lock = threading.Lock()
+        self._servers: dict = {}
+        self.max_pool_size = max_pool_size
+
+    def _server(self, address) -> _ServerPoolStats:
+        key = f"{address[0]}:{address[1]}"
+        stats = self._servers.get(key)
+        if stats is None:
+            stats = self._servers[key] = _ServerPoolStats()
+        return stats
+
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        # The driver drops every pooled connection after a network error or
+        # a primary stepdown; repeated clears point at an unhealthy server.
+        with self._lock:
+            stats = self._server(event.address)
+            stats.cleared += 1
+            stats.last_cleared_at = time.time()
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._servers.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats.open = max(0, stats.open - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats.waiting += 1
+            stats.max_waiting = max(stats.max_waiting, stats.waiting)
+
+    def connection_checked_out(self, event):
+        wait_ms = event.duration * 1000
+        with self._lock:
+            stats = self._server(event.address)
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.in_use += 1
+            stats.max_in_use = max(stats.max_in_use, stats.in_use)
+            stats.checkouts += 1
+            stats.wait_ms_total += wait_ms
+            stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+            stats.wait_ms.append(wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats.waiting = max(0, stats.waiting - 1)
+            stats.checkout_failures[event.reason] = stats.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            stats = self._server(event.address)
+            stats.in_use = max(0, stats.in_use - 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "servers": {address: s.to_dict(self.max_pool_size) for address, s in self._servers.items()},
+            }
+
+
+# Master DB collections keep their own label; everything else is a tenant
+# collection, reported as "tenant" so label counts don't grow with orgs
+MASTER_COLLECTIONS = {"organizations", "admins", "jobs", "migrations", "tenant_pool"}
+
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection")
+)
+mongo_command_failures = Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error", ("command", "collection")
+)
+
+
+def _collection_label(event) -> str:
+    name = event.command.get(event.command_name)
+    if event.command_name == "getMore":
+        name = event.command.get("collection")
+    if not isinstance(name, str):
+        # Admin and session commands (hello, endSessions, commitTransaction...)
+        return ""
+    if event.database_name == settings.MASTER_DB_NAME and name in MASTER_COLLECTIONS:
+        return name
+    return "tenant"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    # The collection is only on the started event; it's parked here until
+    # the matching succeeded/failed event. Plain dict set/pop are atomic,
+    # so the driver's threads share it without a lock.
+    def __init__(self):
+        self._pending: dict = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = _collection_label(event)
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        labels = self._record(event)
+        mongo_command_failures.inc(labels)
+
+    def _record(self, event) -> tuple:
+        labels = (event.command_name, self._pending.pop((event.connection_id, event.request_id), ""))
+        mongo_command_duration.observe(labels, event.duration_micros / 1_000_000)
+        return labels
+
+
+def render_pool_metrics(stats: dict) -> str:
+    # PoolStatsListener.stats() in Prometheus form, one series per server
+    gauges = {
+        "open": "Open pooled connections",
+        "in_use": "Connections checked out",
+        "waiting": "Operations waiting for a connection",
+    }
+    servers = stats["servers"]
+    text = render_family(
+        "mongodb_pool_max_size", "gauge", "maxPoolSize per server", [("", {}, stats["max_pool_size"])]
+    )
+    for field, documentation in gauges.items():
+        text += render_family(f"mongodb_pool_{field}", "gauge", documentation, [
+            ("", {"server": address}, server[field]) for address, server in servers.items()
+        ])
+    text += render_family("mongodb_pool_checkouts_total", "counter", "Connection checkouts", [
+        ("", {"server": address}, server["checkouts"]) for address, server in servers.items()
+    ])
+    text += render_family("mongodb_pool_checkout_failures_total", "counter", "Failed connection checkouts", [
+        ("", {"server": address, "reason": reason}, count)
+        for address, server in servers.items()
+        for reason, count in server["checkout_failures"].items()
+    ])
+    text += render_family("mongodb_pool_cleared_total", "counter", "Pool clears after errors or stepdowns", [
+        ("", {"server": address}, server["cleared"]) for address, server in servers.items()
+    ])
+    return text
+
+
+pool_stats = PoolStatsListener(settings.MONGO_MAX_POOL_SIZE)
+command_metrics = CommandMetricsListener()
@@ -0,0 +1,67 @@
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes every tenant collection gets. Applied when a tenant is created,
+# re-applied after its collection is moved, and rolled out to existing
+# tenants by the "tenant_index_rollout" job. Names must be unique; they are
+# what the drift report matches on. For example:
+#
+#   IndexModel([("created_at", DESCENDING)], name="created_at"),
+#   IndexModel([("external_id", ASCENDING)], name="external_id_unique", unique=True,
+#              partialFilterExpression={"external_id": {"$exists": True}}),
+TENANT_INDEX_TEMPLATES: list = []
+
+# Index options that describe the index itself rather than server bookkeeping
+_SPEC_IGNORED_FIELDS = {"v", "ns", "key", "name"}
+
+
+def _key_pattern(index: dict) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in index["key"].items())
+
+
+async def apply_tenant_indexes(collection) -> dict:
+    # Idempotent; a template the collection can't take (e.g. duplicates
+    # under a unique template) is reported and the rest still get built.
+    results = {}
+    for model in TENANT_INDEX_TEMPLATES:
+        name = model.document["name"]
+        try:
+            await collection.create_indexes([model])
+            results[name] = "ok"
+        except OperationFailure as e:
+            results[name] = f"failed: {e}"
+            logger.warning("Failed to create tenant index %s.%s: %s", collection.name, name, e)
+    return results
+
+
+async def copy_indexes(source, target) -> list:
+    # Re-creates the source's indexes (templates or hand-made) on a copied
+    # target. Copies are built after the data lands, which is much faster
+    # than maintaining them during the inserts.
+    models = []
+    async for index in source.list_indexes():
+        if index["name"] == "_id_":
+            continue
+        options = {key: value for key, value in index.items() if key not in _SPEC_IGNORED_FIELDS}
+        models.append(IndexModel(list(index["key"].items()), name=index["name"], **options))
+    if models:
+        await target.create_indexes(models)
+    return [model.document["name"] for model in models]
+
+
+async def tenant_index_drift(collection) -> dict:
+    existing = {}
+    async for index in collection.list_indexes():
+        existing[_key_pattern(index)] = index
+    missing = []
+    for model in TENANT_INDEX_TEMPLATES:
+        index = existing.get(_key_pattern(model.document))
+        if index is None:
+            missing.append(model.document["name"])
+        elif bool(model.document.get("unique")) != bool(index.get("unique")):
+            missing.append(f"{model.document['name']} (unique mismatch)")
+    return {"missing": missing}
@@ -0,0 +1,26 @@
+from app.db.client import get_master_db
+
+
+class TenantPoolRepository:
+    # Spare tenant collections, one document per pre-created collection.
+    # A spare is claimed by deleting its document, so no two orgs get it.
+    @staticmethod
+    async def add_spare(spare: dict):
+        db = await get_master_db()
+        await db.tenant_pool.insert_one(spare)
+
+    @staticmethod
+    async def claim_spare(cluster: str, db_name: str):
+        db = await get_master_db()
+        return await db.tenant_pool.find_one_and_delete(
+            {"cluster": cluster, "db_name": db_name},
+            sort=[("_id", 1)]
+        )
+
+    @staticmethod
+    async def count_spares(cluster: str, db_name: str) -> int:
+        db = await get_master_db()
+        return await db.tenant_pool.count_documents({"cluster": cluster, "db_name": db_name})
+
+
+tenant_pool_repo = TenantPoolRepository()
@@ -0,0 +1,147 @@
+from app.db.client import MongoDBClient, db_client, get_master_db
+from app.core.config import settings
+from bisect import bisect
+import hashlib
+import time
+
+# The master cluster; orgs created before placement existed have no
+# connection.cluster and live here.
+DEFAULT_CLUSTER = "default"
+
+# Points per target on the hash ring; more points spread orgs more evenly
+_RING_REPLICAS = 100
+
+# How long least-loaded placement trusts its per-target org counts
+_LOAD_REFRESH_SECONDS = 30.0
+
+
+class UnknownTenantCluster(Exception):
+    pass
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class TenantRouter:
+    # Places orgs on (cluster, database) targets and resolves an org's
+    # stored placement to a collection. One pooled client per cluster is
+    # opened on first use and shared by every tenant placed there.
+    def __init__(self):
+        self._clients: dict = {}
+        self._ring: list = None
+        self._ring_targets: list = None
+        self._loads: dict = None
+        self._loads_at = 0.0
+
+    def targets(self) -> list:
+        clusters = list(settings.TENANT_CLUSTERS) or [DEFAULT_CLUSTER]
+        databases = settings.TENANT_DATABASES or [settings.MASTER_DB_NAME]
+        return [(cluster, db_name) for cluster in clusters for db_name in databases]
+
+    def get_client(self, cluster: str = None) -> MongoDBClient:
+        cluster = cluster or DEFAULT_CLUSTER
+        client = self._clients.get(cluster)
+        if client is not None:
+            return client
+        uri = settings.TENANT_CLUSTERS.get(cluster)
+        if cluster == DEFAULT_CLUSTER and not uri:
+            return db_client
+        if not uri:
+            raise UnknownTenantCluster(f"Tenant cluster '{cluster}' is not configured")
+        client = self._clients[cluster] = MongoDBClient(uri)
+        client.connect()
+        return client
+
+    def get_database(self, placement: dict):
+        # placement is an org's connection (or the result of place())
+        client = self.get_client(placement.get("cluster"))
+        return client.get_database(placement["db_name"])
+
+    def get_collection(self, org: dict):
+        return self.get_database(org["connection"])[org["collection_name"]]
+
+    def hash_target(self, org_id: str) -> tuple:
+        # Consistent hashing: adding a target only moves the orgs that land
+        # on its new points, roughly 1/N of them.
+        targets = self.targets()
+        if self._ring is None or self._ring_targets != targets:
+            ring = []
+            for target in targets:
+                for replica in range(_RING_REPLICAS):
+                    ring.append((_hash(f"{target[0]}/{target[1]}#{replica}"), target))
+            ring.sort()
+            self._ring, self._ring_targets = ring, targets
+        index = bisect(self._ring, (_hash(org_id),)) % len(self._ring)
+        return self._ring[index][1]
+
+    async def target_loads(self, refresh: bool = False) -> dict:
+        if refresh or self._loads is None or time.monotonic() - self._loads_at > _LOAD_REFRESH_SECONDS:
+            db = await get_master_db()
+            loads = {target: 0 for target in self.targets()}
+            pipeline = [{"$group": {
+                "_id": {
+                    "cluster": {"$ifNull": ["$connection.cluster", DEFAULT_CLUSTER]},
+                    "db_name": "$connection.db_name",
+                },
+                "orgs": {"$sum": 1},
+            }}]
+            async for row in db.organizations.aggregate(pipeline):
+                loads[(row["_id"]["cluster"], row["_id"]["db_name"])] = row["orgs"]
+            self._loads, self._loads_at = loads, time.monotonic()
+        return self._loads
+
+    async def place(self, org_id: str) -> dict:
+        if settings.TENANT_PLACEMENT == "least_loaded":
+            loads = await self.target_loads()
+            target = min(self.targets(), key=lambda t: loads.get(t, 0))
+            # Count the new org now so a burst of creates doesn't pile onto
+            # the same target until the next refresh
+            loads[target] = loads.get(target, 0) + 1
+        else:
+            target = self.hash_target(org_id)
+        return {"cluster": target[0], "db_name": target[1]}
+
+    def plan_rebalance(self, placements: dict) -> list:
+        # placements maps org_id -> current (cluster, db_name). Returns
+        # (org_id, from, to) moves: orgs on targets that are no longer
+        # configured always move; the rest follow the placement policy.
+        targets = self.targets()
+        if settings.TENANT_PLACEMENT != "least_loaded":
+            return [
+                (org_id, current, self.hash_target(org_id))
+                for org_id, current in sorted(placements.items())
+                if current != self.hash_target(org_id)
+            ]
+
+        members = {target: [] for target in targets}
+        stranded = []
+        for org_id, current in sorted(placements.items()):
+            (members[current] if current in members else stranded).append(org_id)
+
+        destinations = {}
+        for org_id in stranded:
+            target = min(targets, key=lambda t: len(members[t]))
+            members[target].append(org_id)
+            destinations[org_id] = target
+        while True:
+            fullest = max(targets, key=lambda t: len(members[t]))
+            emptiest = min(targets, key=lambda t: len(members[t]))
+            if len(members[fullest]) - len(members[emptiest]) <= 1:
+                break
+            org_id = members[fullest].pop()
+            members[emptiest].append(org_id)
+            destinations[org_id] = emptiest
+        return [
+            (org_id, placements[org_id], target)
+            for org_id, target in sorted(destinations.items())
+            if target != placements[org_id]
+        ]
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._clients = {}
+
+
+tenant_router = TenantRouter()
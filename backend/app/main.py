@@ -1,21 +1,87 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from app.db.client import db_client
-from app.api import auth, orgs
+from app.db.monitoring import pool_stats, render_pool_metrics
+from app.core.metrics import MetricsMiddleware, render
+from app.core.profiling import ProfilingMiddleware
+from app.core.log import RequestIdMiddleware, configure_logging, shutdown_logging
+from app.db.tenant_router import UnknownTenantCluster, tenant_router
+from app.db.indexes import start_index_bootstrap, stop_index_bootstrap
+from app.core.config import settings
+from app.core.security import PasswordHasherBusy, calibrate_salt_rounds_async, shutdown_hash_executor
+from app.services.job_service import job_runner
+from app.services.tenant_pool_service import tenant_pool
+from app.services.org_reaper_service import org_reaper
+from app.api import auth, orgs, ops, tenant_data
+import logging
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifelong(app: FastAPI):
     # Startup
+    configure_logging()
     db_client.connect()
+    if settings.PASSWORD_HASH_TARGET_MS:
+        rounds = await calibrate_salt_rounds_async()
+        logger.info("Calibrated bcrypt cost to %s rounds for %sms", rounds, settings.PASSWORD_HASH_TARGET_MS)
+    if settings.MASTER_INDEXES_AUTO_CREATE:
+        start_index_bootstrap()
+    # Workers also pick up jobs left queued or running by a previous process
+    await job_runner.start()
+    await tenant_pool.start()
+    await org_reaper.start()
     yield
     # Shutdown
+    await org_reaper.stop()
+    await tenant_pool.stop()
+    await job_runner.stop()
+    await stop_index_bootstrap()
+    shutdown_hash_executor()
+    tenant_router.close()
     db_client.close()
+    shutdown_logging()
 
 app = FastAPI(title="Multi-Tenant Organization Backend", lifespan=lifelong)
+# Middleware added last runs first: every record logged while handling a
+# request carries its id, and a profile covers the whole request
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(UnknownTenantCluster)
+async def unknown_tenant_cluster(request: Request, exc: UnknownTenantCluster):
+    # An org placed on a cluster that has since been removed from TENANT_CLUSTERS
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+    )
 
 app.include_router(auth.router, tags=["Authentication"])
 app.include_router(orgs.router)
+app.include_router(tenant_data.router)
+app.include_router(ops.router)
 
 @app.get("/")
 async def root():
     return {"message": "Service is running"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # Prometheus scrape target. Each uvicorn worker keeps its own figures,
+    # so scrape every worker (or run one per container).
+    return PlainTextResponse(
+        render() + render_pool_metrics(pool_stats.stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
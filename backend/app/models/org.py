@@ -5,6 +5,7 @@ from datetime import datetime
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
 class OrgConnection(BaseModel):
+    cluster: str = "default"
     db_name: str
     collection_name: str
     extra: dict = {}
@@ -12,6 +13,8 @@ class OrgConnection(BaseModel):
 class OrganizationInDB(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     organization_name: str
+    # org_<ObjectId>; fixed at creation, collection_name mirrors it
+    storage_key: str
     collection_name: str
     connection: OrgConnection
     admin_user_id: Optional[PyObjectId]
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class JobProgress(BaseModel):
+    total: Optional[int] = None
+    copied: int = 0
+    docs_per_sec: Optional[float] = None
+    eta_seconds: Optional[float] = None
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    organization_id: Optional[str] = None
+    params: dict = {}
+    progress: JobProgress
+    attempts: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,8 +1,16 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, Any
+from pydantic import AliasChoices, BaseModel, BeforeValidator, EmailStr, Field, validator
+from typing import Annotated, Optional, Any, List
 from datetime import datetime
 import re
 
+# ObjectIds read from Mongo documents, rendered as hex strings
+ObjectIdStr = Annotated[str, BeforeValidator(str)]
+
+def _validate_org_name(v):
+    if not re.match(r"^[a-zA-Z0-9\-]+$", v):
+        raise ValueError("Organization name must contain only letters, numbers, and hyphens.")
+    return v.lower()
+
 class OrgCreateRequest(BaseModel):
     organization_name: str
     email: EmailStr
@@ -10,28 +18,76 @@ class OrgCreateRequest(BaseModel):
 
     @validator("organization_name")
     def validate_org_name(cls, v):
-        if not re.match(r"^[a-zA-Z0-9\-]+$", v):
-            raise ValueError("Organization name must contain only letters, numbers, and hyphens.")
-        return v.lower()
+        return _validate_org_name(v)
 
 class OrgConnectionResponse(BaseModel):
+    cluster: str = "default"
     db_name: str
     collection_name: str
     extra: dict = {}
 
 class OrgResponse(BaseModel):
-    id: str
+    # Built with OrgResponse.model_validate(org_doc): one validation pass
+    # over the organizations document, "_id" filling id
+    id: ObjectIdStr = Field(validation_alias=AliasChoices("_id", "id"))
     organization_name: str
+    storage_key: Optional[str] = None
     collection_name: str
-    admin_user_id: str
+    admin_user_id: ObjectIdStr
     connection: Optional[OrgConnectionResponse] = None
     created_at: datetime
 
+class OrgBulkCreateRequest(BaseModel):
+    organizations: List[OrgCreateRequest] = Field(min_length=1)
+
+class OrgBulkCreateResult(BaseModel):
+    index: int
+    organization_name: str
+    status_code: int
+    organization: Optional[OrgResponse] = None
+    error: Optional[str] = None
+
+# Response envelopes. FastAPI validates a handler's return value into
+# these once (instances of them pass through as they are) and dumps them
+# straight to JSON bytes.
+class OrgEnvelope(BaseModel):
+    ok: bool = True
+    organization: OrgResponse
+
+class OrgBulkCreateResponse(BaseModel):
+    ok: bool
+    created: int
+    failed: int
+    results: List[OrgBulkCreateResult]
+
+class OrgListResponse(BaseModel):
+    ok: bool = True
+    organizations: List[dict]
+    next_cursor: Optional[str] = None
+
+class OrgUpdateResponse(BaseModel):
+    ok: bool = True
+    message: str
+    organization: OrgResponse
+
+class OrgRenameScheduledResponse(OrgUpdateResponse):
+    # 202 from /org/update: a legacy org's rename runs as a job
+    job_id: str
+
+class OrgDeleteResponse(BaseModel):
+    ok: bool = True
+    message: str
+
 class OrgUpdateRequest(BaseModel):
     organization_name: str
     new_organization_name: Optional[str] = None
     email: Optional[EmailStr] = None
     password: Optional[str] = None
 
+    @validator("new_organization_name")
+    def validate_new_org_name(cls, v):
+        # Renames obey the same rules as signups
+        return _validate_org_name(v) if v is not None else v
+
 class OrgDeleteRequest(BaseModel):
     organization_name: str
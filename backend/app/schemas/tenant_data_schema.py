@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+# Filters, projections and documents use MongoDB Extended JSON, so
+# {"$oid": ...} and {"$date": ...} round-trip as ObjectId and datetime.
+
+
+class TenantDocumentsCreateRequest(BaseModel):
+    documents: List[dict] = Field(min_length=1, max_length=1000)
+
+
+class TenantDocumentUpdateRequest(BaseModel):
+    set: dict = {}
+    unset: List[str] = []
+
+
+class TenantQueryRequest(BaseModel):
+    filter: dict = {}
+    projection: Optional[Dict[str, int]] = None
+    # Applied in order; _id is always added as the final tie-breaker
+    sort: Dict[str, int] = {}
+    limit: int = Field(100, ge=1, le=1000)
+    # Documents per round trip to the server; defaults to the driver's choice
+    batch_size: Optional[int] = Field(None, ge=1, le=10000)
+    # next_continuation from the previous page of the same query
+    continuation: Optional[str] = None
+    # Stream every match as NDJSON instead of returning one page
+    stream: bool = False
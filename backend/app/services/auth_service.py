@@ -1,19 +1,46 @@
 from fastapi import HTTPException, status
 from app.db.master_repo import MasterRepository
-from app.core.security import verify_password, create_access_token
+from app.core.security import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    needs_rehash,
+    record_login_hash_cost,
+)
 from app.schemas.auth_schema import AdminLoginRequest, Token
 from app.core.config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Strong references to in-flight rehash tasks
+_rehash_tasks = set()
 
 class AuthService:
     @staticmethod
     async def authenticate_admin(login_data: AdminLoginRequest) -> Token:
         admin_data = await MasterRepository.get_admin_by_email(login_data.email)
-        if not admin_data:
+        # Admins of a deleted org linger until the reaper purges them
+        if not admin_data or admin_data.get("deleted_at"):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         
-        if not verify_password(login_data.password, admin_data["password_hash"]):
+        if not await verify_password_async(login_data.password, admin_data["password_hash"]):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+        # Upgrade hashes made with an outdated cost while we have the plaintext.
+        # Done in the background so the login itself doesn't pay for it.
+        rehash = needs_rehash(admin_data["password_hash"])
+        record_login_hash_cost(admin_data["password_hash"], rehashed=rehash)
+        if rehash:
+            task = asyncio.create_task(
+                AuthService._rehash_password(
+                    str(admin_data["_id"]), login_data.password, admin_data["password_hash"]
+                )
+            )
+            _rehash_tasks.add(task)
+            task.add_done_callback(_rehash_tasks.discard)
+
         # Create JWT
         token_payload = {
             "sub": str(admin_data["_id"]),
@@ -33,3 +60,18 @@ class AuthService:
                 "organization_id": str(admin_data["organization_id"])
             }
         )
+
+    @staticmethod
+    async def _rehash_password(admin_id: str, password: str, old_password_hash: str):
+        try:
+            password_hash = await get_password_hash_async(password)
+            await MasterRepository.update_admin_credentials(
+                admin_id,
+                password_hash=password_hash,
+                expected_password_hash=old_password_hash,
+                # Same password, so existing sessions stay valid
+                revoke_tokens=False
+            )
+        except Exception as e:
+            # Not fatal: the next login tries again
+            logger.warning("Failed to rehash password for admin %s: %s", admin_id, e)
@@ -0,0 +1,228 @@
+from fastapi import HTTPException
+from app.db.job_repo import job_repo
+from app.core.config import settings
+from app.schemas.job_schema import JobResponse, JobProgress
+from app.services.migration_service import MigrationService
+from app.services.tenant_index_service import TenantIndexService
+from app.core.log import request_id
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between progress writes for a single job
+PROGRESS_WRITE_INTERVAL_SECONDS = 1.0
+
+
+async def _run_org_migration(job: dict, progress):
+    params = job["params"]
+    return await MigrationService.perform_migration(
+        str(job["organization_id"]),
+        params.get("new_organization_name"),
+        progress=progress
+    )
+
+
+async def _run_tenant_index_rollout(job: dict, progress):
+    # Resumes after the last tenant a previous attempt finished
+    checkpoint = job.get("checkpoint") or {}
+
+    async def save_checkpoint(last_org_id, processed: int):
+        await job_repo.update_job(job["_id"], {
+            "checkpoint": {"last_org_id": last_org_id, "processed": processed}
+        })
+
+    return await TenantIndexService.rollout(
+        progress,
+        after_id=checkpoint.get("last_org_id"),
+        processed=checkpoint.get("processed", 0),
+        checkpoint=save_checkpoint
+    )
+
+
+JOB_HANDLERS = {
+    "org_migration": _run_org_migration,
+    "tenant_index_rollout": _run_tenant_index_rollout,
+}
+
+
+class JobRunner:
+    # Jobs live in the master DB and are claimed with a lease, so any worker
+    # process can pick up work that a crashed or restarted process left behind.
+    def __init__(self):
+        self.owner = uuid.uuid4().hex
+        self.workers: list = []
+        self.wakeup = asyncio.Event()
+
+    async def start(self):
+        if self.workers:
+            return
+        self.wakeup = asyncio.Event()
+        self.workers = [
+            asyncio.create_task(self._worker_loop())
+            for _ in range(max(1, settings.JOB_WORKERS))
+        ]
+        logger.info("Started %d job workers", len(self.workers))
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        await job_repo.release_jobs(self.owner)
+
+    async def submit(self, job_type: str, org_id: str, params: dict) -> str:
+        # org_id is None for jobs that span every organization
+        now = datetime.utcnow()
+        job_id = await job_repo.create_job({
+            "type": job_type,
+            "organization_id": ObjectId(org_id) if org_id else None,
+            "params": params,
+            "status": "queued",
+            "progress": {"total": None, "copied": 0},
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        self.wakeup.set()
+        return job_id
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                job = await job_repo.claim_next_job(self.owner, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS)
+            except Exception as e:
+                logger.warning("Failed to claim job: %s", e)
+                job = None
+
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._execute(job)
+            except Exception as e:
+                # The lease expires and another worker retries the job
+                logger.warning("Failed to record outcome of job %s: %s", job["_id"], e)
+
+    async def _execute(self, job: dict):
+        job_id = job["_id"]
+        # Records logged by the job carry its id in place of a request id
+        request_id.set(f"job-{job_id}")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        last_write = 0.0
+
+        async def progress(copied: int, total: int = None):
+            nonlocal last_write
+            now = time.monotonic()
+            if total is None and now - last_write < PROGRESS_WRITE_INTERVAL_SECONDS:
+                return
+            last_write = now
+            update = {"progress.copied": copied}
+            if total is not None:
+                update["progress.total"] = total
+            await job_repo.update_job(job_id, update)
+
+        try:
+            handler = JOB_HANDLERS[job["type"]]
+            result = await handler(job, progress)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # HTTPExceptions are deterministic failures; anything else is retried
+            retry = not isinstance(e, HTTPException) and job.get("attempts", 1) < settings.JOB_MAX_ATTEMPTS
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning("Job %s failed (attempt %s): %s", job_id, job.get("attempts"), error)
+            await job_repo.update_job(job_id, {
+                "status": "queued" if retry else "failed",
+                "error": error,
+                "owner": None,
+                "lease_expires_at": None,
+                "finished_at": None if retry else datetime.utcnow(),
+            })
+        else:
+            update = {
+                "status": "completed",
+                "result": result,
+                "error": None,
+                "owner": None,
+                "lease_expires_at": None,
+                "finished_at": datetime.utcnow(),
+            }
+            if result and "documents" in result:
+                update["progress.copied"] = result["documents"]
+            await job_repo.update_job(job_id, update)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id):
+        interval = max(1, settings.JOB_LEASE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job_repo.renew_lease(job_id, self.owner, settings.JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning("Failed to renew lease for job %s: %s", job_id, e)
+
+
+job_runner = JobRunner()
+
+
+class JobService:
+    @staticmethod
+    async def get_job(job_id: str, org_id: str) -> JobResponse:
+        job = await job_repo.get_job(job_id)
+        # Jobs of other organizations are reported as missing
+        if not job or str(job["organization_id"]) != org_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobService.to_response(job)
+
+    @staticmethod
+    async def list_jobs(org_id: str, limit: int = 20) -> list:
+        jobs = await job_repo.list_jobs_by_org_id(org_id, limit)
+        return [JobService.to_response(job) for job in jobs]
+
+    @staticmethod
+    def to_response(job: dict) -> JobResponse:
+        progress = job.get("progress") or {}
+        copied = progress.get("copied") or 0
+        total = progress.get("total")
+
+        docs_per_sec = None
+        eta_seconds = None
+        if job["status"] == "running" and job.get("started_at"):
+            elapsed = (datetime.utcnow() - job["started_at"]).total_seconds()
+            if elapsed > 0 and copied:
+                docs_per_sec = round(copied / elapsed, 1)
+                if total is not None:
+                    eta_seconds = round(max(total - copied, 0) / docs_per_sec, 1)
+        elif job["status"] == "completed" and job.get("started_at") and job.get("finished_at"):
+            elapsed = (job["finished_at"] - job["started_at"]).total_seconds()
+            if elapsed > 0:
+                docs_per_sec = round(copied / elapsed, 1)
+            eta_seconds = 0.0
+
+        return JobResponse(
+            id=str(job["_id"]),
+            type=job["type"],
+            status=job["status"],
+            organization_id=str(job["organization_id"]) if job.get("organization_id") else None,
+            params=job.get("params") or {},
+            progress=JobProgress(total=total, copied=copied, docs_per_sec=docs_per_sec, eta_seconds=eta_seconds),
+            attempts=job.get("attempts", 0),
+            result=job.get("result"),
+            error=job.get("error"),
+            created_at=job["created_at"],
+            started_at=job.get("started_at"),
+            finished_at=job.get("finished_at"),
+        )
@@ -1,62 +1,243 @@
-from app.db.client import get_master_db, get_tenant_collection_name
+from app.db.client import MongoDBClient, db_client, get_master_db, get_tenant_storage_key
+from app.db.tenant_router import tenant_router
+from app.db.tenant_indexes import apply_tenant_indexes, copy_indexes
 from app.db.master_repo import master_repo
+from app.core.config import settings
+from app.services.migration_strategies import (
+    STRATEGIES,
+    MigrationStrategy,
+    MigrationVerificationError,
+    StrategyUnavailable,
+)
 from fastapi import HTTPException
+from bson import ObjectId
 from datetime import datetime
+from typing import List
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class MigrationService:
     @staticmethod
-    async def perform_migration(old_org_name: str, new_org_name: str, org_id: str):
+    async def perform_migration(org_id: str, new_org_name: str = None, strategy: str = None, progress=None):
+        # Moves a legacy name-keyed tenant collection onto the org's stable
+        # storage key, optionally applying a new name in the same update.
+        # After this runs once, renames are metadata-only.
         db = await get_master_db()
-        
-        old_collection_name = await get_tenant_collection_name(old_org_name)
-        new_collection_name = await get_tenant_collection_name(new_org_name)
+
+        org = await master_repo.get_org_by_id(org_id)
+        if not org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        client = tenant_router.get_client(org["connection"].get("cluster"))
+        tenant_db = tenant_router.get_database(org["connection"])
+
+        old_collection_name = org["collection_name"]
+        # Orgs provisioned from the warm pool keep the spare's key
+        new_collection_name = org.get("storage_key") or await get_tenant_storage_key(org_id)
+
+        update_data = {
+            "storage_key": new_collection_name,
+            "collection_name": new_collection_name,
+            "connection.collection_name": new_collection_name,
+            "updated_at": datetime.utcnow()
+        }
+        if new_org_name:
+            update_data["organization_name"] = new_org_name
 
         if old_collection_name == new_collection_name:
-            return # No change needed
-
-        # 1. Create New Collection (implicitly created on write, but good to be explicit or check checks)
-        # 2. Bulk Copy Documents
-        old_collection = db[old_collection_name]
-        new_collection = db[new_collection_name]
-
-        # Use aggregation $out or manual copy? 
-        # Atlas restricts $out across DBs but checking if single DB approach is used (yes per PRD).
-        # However, manual batch copy is safer for "migration" with verification logic.
-        # For simplicity and "single DB", we can try $merge or simple iterating.
-        
-        # Using simple iteration for robustness in this example (for large datasets, use cursor and bulk_write)
-        # Note: In production with millions of docs, use a background worker or database tools.
-        
-        docs_to_copy = []
-        async for doc in old_collection.find({}):
-            docs_to_copy.append(doc)
-            
-        if docs_to_copy:
-            await new_collection.insert_many(docs_to_copy)
-
-        # 3. Verify Counts
-        count_old = await old_collection.count_documents({})
-        count_new = await new_collection.count_documents({})
-
-        if count_old != count_new:
-            # Rollback: Drop new collection
-            await new_collection.drop()
-            raise HTTPException(status_code=500, detail="Migration verification failed: Document counts do not match.")
-
-        # 4. Update Organization Metadata
-        await master_repo.update_org_metadata(
-            org_id, 
-            {
-                "organization_name": new_org_name,
-                "collection_name": new_collection_name,
-                "connection.collection_name": new_collection_name,
-                "updated_at": datetime.utcnow()
-            }
-        )
+            await master_repo.update_org_metadata(org_id, update_data)
+            return None
+
+        old_collection = tenant_db[old_collection_name]
+        new_collection = tenant_db[new_collection_name]
+
+        # Migration record doubles as the resume checkpoint for client-side copies
+        checkpoint_filter = {
+            "org_id": ObjectId(org_id),
+            "source": old_collection_name,
+            "target": new_collection_name,
+            "status": "running",
+        }
+
+        # 1. Move Documents, falling back through strategies the deployment rejects
+        started = time.perf_counter()
+        source_exists = await tenant_db.list_collection_names(filter={"name": old_collection_name})
+        target_exists = await tenant_db.list_collection_names(filter={"name": new_collection_name})
+        if not source_exists and target_exists:
+            # A previous run already renamed the collection but died before
+            # updating the metadata; copying from the missing source would
+            # wipe the target during verification.
+            used, copied = STRATEGIES["rename"], await new_collection.estimated_document_count()
+        else:
+            used, copied = await MigrationService._move_documents(
+                db, old_collection, new_collection, checkpoint_filter, strategy, progress, client
+            )
+        await MigrationService._carry_over_indexes(old_collection, new_collection, used)
 
-        # 5. Drop Old Collection (or soft delete/rename for backup)
+        # 2. Update Organization Metadata
+        await master_repo.update_org_metadata(org_id, update_data)
+
+        # 3. Drop Old Collection (or soft delete/rename for backup)
         # Per PRD: "Drop old collection only after successful verification or keep backup"
         # We will drop for now to keep it clean, but consider renaming to _backup in p2
-        await old_collection.drop()
-        
-        return True
+        if not used.moves_source:
+            await old_collection.drop()
+
+        # 4. Record which strategy ran
+        result = {
+            "strategy": used.name,
+            "documents": copied,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        await db.migrations.update_one(
+            checkpoint_filter,
+            {"$set": {**result, "status": "completed", "finished_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return result
+
+    @staticmethod
+    async def move_tenant(org_id: str, cluster: str, db_name: str, strategy: str = None, progress=None):
+        # Moves an org's collection to another (cluster, database) placement
+        # under the same collection name. The tenant's writes are fenced
+        # (503) from before the copy until the new placement is live.
+        db = await get_master_db()
+
+        org = await master_repo.get_org_by_id(org_id)
+        if not org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        if not org.get("storage_key"):
+            raise HTTPException(status_code=409, detail="Organization has no storage key yet; run the backfill first")
+
+        connection = org["connection"]
+        source_cluster = connection.get("cluster", "default")
+        if (source_cluster, connection["db_name"]) == (cluster, db_name):
+            return None
+
+        collection_name = org["collection_name"]
+        old_collection = tenant_router.get_collection(org)
+        new_collection = tenant_router.get_database({"cluster": cluster, "db_name": db_name})[collection_name]
+        checkpoint_filter = {
+            "org_id": ObjectId(org_id),
+            "source": f"{source_cluster}/{connection['db_name']}.{collection_name}",
+            "target": f"{cluster}/{db_name}.{collection_name}",
+            "status": "running",
+        }
+
+        # Other processes serve the org from their cache for up to
+        # ORG_CACHE_TTL_SECONDS, so the fence (and later the new placement)
+        # only reaches all of them once that has passed
+        cache_wait = settings.ORG_CACHE_TTL_SECONDS + settings.TENANT_MOVE_FENCE_GRACE_SECONDS
+
+        started = time.perf_counter()
+        await master_repo.update_org_metadata(org_id, {"migrating": True, "updated_at": datetime.utcnow()})
+        switched = False
+        try:
+            await asyncio.sleep(cache_wait)
+            used, copied = await MigrationService._move_documents(
+                db, old_collection, new_collection, checkpoint_filter, strategy, progress,
+                tenant_router.get_client(cluster)
+            )
+            await MigrationService._carry_over_indexes(old_collection, new_collection, used)
+
+            await master_repo.update_org_metadata(org_id, {
+                "connection.cluster": cluster,
+                "connection.db_name": db_name,
+                "migrating": False,
+                "updated_at": datetime.utcnow(),
+            })
+            switched = True
+        finally:
+            if not switched:
+                # The source is still the live copy; reopen it for writes
+                try:
+                    await master_repo.update_org_metadata(org_id, {"migrating": False, "updated_at": datetime.utcnow()})
+                except Exception as e:
+                    logger.warning("Failed to lift the write fence on org %s: %s", org_id, e)
+
+        if not used.moves_source:
+            # Stale cached docs still read from the source (their writes are
+            # fenced); drop it once they have all expired
+            await asyncio.sleep(cache_wait)
+            await old_collection.drop()
+
+        result = {
+            "strategy": used.name,
+            "documents": copied,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        await db.migrations.update_one(
+            checkpoint_filter,
+            {"$set": {**result, "status": "completed", "finished_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return result
+
+    @staticmethod
+    async def _carry_over_indexes(old_collection, new_collection, used: MigrationStrategy):
+        # A rename keeps the collection's indexes; copies start bare, so the
+        # source's indexes are rebuilt on the target before it goes live.
+        # Templates are applied either way in case the source predates them.
+        if not used.moves_source:
+            await copy_indexes(old_collection, new_collection)
+        await apply_tenant_indexes(new_collection)
+
+    @staticmethod
+    async def _move_documents(db, old_collection, new_collection, checkpoint_filter: dict, strategy: str = None, progress=None,
+                              client: MongoDBClient = db_client):
+        # client is the cluster holding the target; its capabilities decide
+        # which strategies are tried
+        candidates = await MigrationService.select_strategies(
+            old_collection, new_collection, db.migrations, checkpoint_filter, strategy, client
+        )
+        if progress:
+            await progress(0, await old_collection.estimated_document_count())
+        for candidate in candidates:
+            await db.migrations.update_one(
+                checkpoint_filter,
+                {"$set": {"strategy": candidate.name, "updated_at": datetime.utcnow()},
+                 "$setOnInsert": {"started_at": datetime.utcnow()}},
+                upsert=True
+            )
+            try:
+                copied = await candidate.run(old_collection, new_collection, db.migrations, checkpoint_filter, progress)
+                return candidate, copied
+            except StrategyUnavailable as e:
+                logger.warning("Migration strategy %s unavailable: %s", candidate.name, e)
+                if e.unsupported:
+                    capabilities = await client.get_capabilities()
+                    capabilities[candidate.name] = False
+            except MigrationVerificationError as e:
+                # Rollback: Drop new collection and forget the checkpoint
+                await new_collection.drop()
+                await db.migrations.delete_one(checkpoint_filter)
+                raise HTTPException(status_code=500, detail=f"Migration verification failed: {e}")
+
+        raise HTTPException(status_code=500, detail="No migration strategy could be applied.")
+
+    @staticmethod
+    async def select_strategies(source, target, checkpoints, checkpoint_filter: dict, strategy: str = None,
+                                client: MongoDBClient = db_client) -> List[MigrationStrategy]:
+        # Ordered by preference: metadata rename, server-side $merge, then a
+        # client-side copy sized to the collection.
+        strategy = strategy or settings.MIGRATION_STRATEGY
+        if strategy != "auto":
+            if strategy not in STRATEGIES:
+                raise HTTPException(status_code=400, detail=f"Unknown migration strategy '{strategy}'")
+            return [STRATEGIES[strategy]]
+
+        capabilities = await client.get_capabilities()
+        resuming = await checkpoints.find_one({**checkpoint_filter, "last_id": {"$exists": True}})
+        if resuming or await source.estimated_document_count() > settings.MIGRATION_BUFFERED_MAX_DOCS:
+            client_copy = STRATEGIES["streaming"]
+        else:
+            client_copy = STRATEGIES["buffered"]
+
+        candidates = []
+        for candidate in (STRATEGIES["rename"], STRATEGIES["merge"], client_copy):
+            if await candidate.is_supported(source, target, capabilities):
+                candidates.append(candidate)
+        return candidates
@@ -0,0 +1,208 @@
+from app.core.config import settings
+from pymongo.errors import BulkWriteError, OperationFailure
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+import asyncio
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Server error codes meaning "this deployment won't let us do that"
+UNSUPPORTED_ERROR_CODES = {
+    13,   # Unauthorized
+    20,   # IllegalOperation (e.g. sharded collection on older servers)
+    59,   # CommandNotFound
+    115,  # CommandNotSupported
+    8000, # Atlas shared tier restriction
+}
+
+
+class MigrationVerificationError(Exception):
+    pass
+
+
+class StrategyUnavailable(Exception):
+    def __init__(self, message: str, unsupported: bool = False):
+        super().__init__(message)
+        # True when the deployment itself can't run the strategy
+        self.unsupported = unsupported
+
+
+class MigrationStrategy(ABC):
+    # run() returns the number of documents in the target; the optional
+    # progress coroutine is awaited with the running copied count.
+    name: str = ""
+    # True when the source collection no longer exists after run()
+    moves_source: bool = False
+
+    async def is_supported(self, source, target, capabilities: dict) -> bool:
+        return True
+
+    @abstractmethod
+    async def run(self, source, target, checkpoints, checkpoint_filter: dict, progress=None) -> int:
+        ...
+
+
+class RenameCollectionStrategy(MigrationStrategy):
+    # Metadata-only move; O(1) regardless of collection size.
+    name = "rename"
+    moves_source = True
+
+    async def is_supported(self, source, target, capabilities: dict) -> bool:
+        return (
+            capabilities.get("rename", True)
+            and source.database.client is target.database.client
+            and source.database.name == target.database.name
+        )
+
+    async def run(self, source, target, checkpoints, checkpoint_filter: dict, progress=None) -> int:
+        try:
+            await source.rename(target.name)
+        except OperationFailure as e:
+            # Covers both restricted deployments and a leftover target from an
+            # interrupted copy; either way a copy strategy can take over.
+            raise StrategyUnavailable(str(e), unsupported=e.code in UNSUPPORTED_ERROR_CODES) from e
+        return await target.estimated_document_count()
+
+
+class AggregationCopyStrategy(MigrationStrategy):
+    # Server-side copy through $merge; documents never leave the cluster.
+    name = "merge"
+
+    async def is_supported(self, source, target, capabilities: dict) -> bool:
+        return (
+            capabilities.get("version", (0,)) >= (4, 2)
+            and capabilities.get("merge", True)
+            and source.database.client is target.database.client
+        )
+
+    async def run(self, source, target, checkpoints, checkpoint_filter: dict, progress=None) -> int:
+        pipeline = [{
+            "$merge": {
+                "into": {"db": target.database.name, "coll": target.name},
+                "on": "_id",
+                # keepExisting makes a re-run after a failure idempotent
+                "whenMatched": "keepExisting",
+                "whenNotMatched": "insert",
+            }
+        }]
+        try:
+            await source.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        except OperationFailure as e:
+            if e.code in UNSUPPORTED_ERROR_CODES:
+                raise StrategyUnavailable(str(e), unsupported=True) from e
+            raise
+
+        count_old = await source.count_documents({})
+        count_new = await target.count_documents({})
+        if count_old != count_new:
+            raise MigrationVerificationError("Document counts do not match.")
+        return count_new
+
+
+class StreamingCopyStrategy(MigrationStrategy):
+    # Client-side copy that reads the source in _id order and keeps at most
+    # MIGRATION_CONCURRENCY batches in flight, so memory stays flat.
+    name = "streaming"
+
+    async def run(self, source, target, checkpoints, checkpoint_filter: dict, progress=None) -> int:
+        batch_size = max(1, settings.MIGRATION_BATCH_SIZE)
+        concurrency = max(1, settings.MIGRATION_CONCURRENCY)
+
+        query = {}
+        copied = 0
+        checkpoint = await checkpoints.find_one(checkpoint_filter)
+        if checkpoint and checkpoint.get("last_id") is not None:
+            query = {"_id": {"$gt": checkpoint["last_id"]}}
+            copied = checkpoint.get("copied", 0)
+
+        in_flight = deque()
+
+        async def complete_oldest():
+            # Batches complete in read order, so the checkpoint only ever
+            # advances past a contiguous, verified prefix of the source.
+            nonlocal copied
+            task, last_id, size = in_flight.popleft()
+            await task
+            copied += size
+            await checkpoints.update_one(
+                checkpoint_filter,
+                {"$set": {"last_id": last_id, "copied": copied, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+            if progress:
+                await progress(copied)
+
+        async def submit(batch: list):
+            if len(in_flight) >= concurrency:
+                await complete_oldest()
+            task = asyncio.create_task(self._insert_batch(target, batch))
+            in_flight.append((task, batch[-1]["_id"], len(batch)))
+
+        try:
+            batch = []
+            async for doc in source.find(query, sort=[("_id", 1)], batch_size=batch_size):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    await submit(batch)
+                    batch = []
+            if batch:
+                await submit(batch)
+            while in_flight:
+                await complete_oldest()
+        finally:
+            for task, _, _ in in_flight:
+                task.cancel()
+
+        return copied
+
+    @staticmethod
+    async def _insert_batch(target, batch: list):
+        try:
+            await target.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Documents left behind by an interrupted run are fine to skip
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+                raise
+
+        # Batches are disjoint _id ranges of the source, so the target must
+        # hold exactly this many documents within the batch's range.
+        count = await target.count_documents(
+            {"_id": {"$gte": batch[0]["_id"], "$lte": batch[-1]["_id"]}}
+        )
+        if count != len(batch):
+            raise MigrationVerificationError(
+                f"Batch ending at {batch[-1]['_id']} has {count} of {len(batch)} documents."
+            )
+
+
+class BufferedCopyStrategy(MigrationStrategy):
+    # Original single-shot copy: loads the whole collection into memory.
+    # Only picked for small collections; also the benchmark baseline.
+    name = "buffered"
+
+    async def run(self, source, target, checkpoints, checkpoint_filter: dict, progress=None) -> int:
+        docs_to_copy = []
+        async for doc in source.find({}):
+            docs_to_copy.append(doc)
+
+        if docs_to_copy:
+            await target.insert_many(docs_to_copy)
+
+        count_old = await source.count_documents({})
+        count_new = await target.count_documents({})
+        if count_old != count_new:
+            raise MigrationVerificationError("Document counts do not match.")
+        return count_new
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        RenameCollectionStrategy(),
+        AggregationCopyStrategy(),
+        StreamingCopyStrategy(),
+        BufferedCopyStrategy(),
+    )
+}
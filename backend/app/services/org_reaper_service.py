@@ -0,0 +1,72 @@
+from app.db.master_repo import master_repo
+from app.db.tenant_router import tenant_router
+from app.core.config import settings
+import asyncio
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OrgReaper:
+    # Removes the data of soft-deleted orgs in the background. The deleted
+    # org documents are the queue, claimed with a lease like jobs are, so
+    # deletions left behind by a restart are picked up by any process.
+    # Workers pause after every org to spread mass offboarding out.
+    def __init__(self):
+        self.owner = uuid.uuid4().hex
+        self.workers: list = []
+        self.wakeup = asyncio.Event()
+
+    async def start(self):
+        if self.workers:
+            return
+        self.wakeup = asyncio.Event()
+        self.workers = [
+            asyncio.create_task(self._worker_loop())
+            for _ in range(max(1, settings.ORG_REAPER_CONCURRENCY))
+        ]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    @staticmethod
+    async def purge(org: dict):
+        # Every step is idempotent and the org document goes last, so a purge
+        # that dies halfway is simply run again
+        org_id = str(org["_id"])
+        await asyncio.gather(
+            tenant_router.get_collection(org).drop(),
+            master_repo.delete_admins_by_org_id(org_id)
+        )
+        await master_repo.delete_org(org_id)
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                org = await master_repo.claim_deleted_org(self.owner, settings.ORG_REAPER_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning("Failed to claim deleted org: %s", e)
+                org = None
+
+            if org is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=settings.ORG_REAPER_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await OrgReaper.purge(org)
+                logger.info("Purged deleted org %s (%s)", org["_id"], org.get("deleted_name"), extra={"event": "org_purged"})
+            except Exception as e:
+                # The lease lapses and the purge is retried
+                logger.warning("Failed to purge deleted org %s: %s", org["_id"], e)
+            await asyncio.sleep(settings.ORG_REAPER_PAUSE_SECONDS)
+
+
+org_reaper = OrgReaper()
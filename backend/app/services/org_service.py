@@ -1,95 +1,376 @@
 from fastapi import HTTPException, status
 from app.db.master_repo import master_repo
-from app.db.client import get_tenant_collection_name, get_master_db
-from app.schemas.org_schema import OrgCreateRequest, OrgResponse, OrgConnectionResponse
-from app.core.security import get_password_hash
+from app.db.job_repo import job_repo
+from app.db.client import db_client, get_tenant_storage_key, supports_transactions
+from app.db.indexes import is_index_ready
+from app.db.tenant_indexes import apply_tenant_indexes
+from app.db.tenant_router import tenant_router
+from app.services.tenant_pool_service import tenant_pool
+from app.services.org_reaper_service import org_reaper
+from app.schemas.org_schema import OrgCreateRequest, OrgResponse, OrgBulkCreateResult
+from app.core.security import PasswordHasherBusy, get_password_hash_async, hash_pool_size
+from app.services.job_service import job_runner
 from app.core.config import settings
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from datetime import datetime
+from typing import List
 from bson import ObjectId
+import asyncio
+import base64
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+ILLEGAL_OPERATION = 20
+# 20: not a replica set member or mongos; 263: implicit collection
+# creation inside a transaction (servers before 4.4)
+TRANSACTION_UNSUPPORTED_ERROR_CODES = {ILLEGAL_OPERATION, 263}
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _duplicate_detail(error_details: dict) -> str:
+    # keyPattern names the violated index; older servers only put it in errmsg
+    error_details = error_details or {}
+    if "email" in error_details.get("keyPattern", {}) or "email_unique" in error_details.get("errmsg", ""):
+        return "Admin email already registered"
+    return "Organization already exists"
+
+
+# Fields GET /org/list can project; id is always returned
+ORG_LIST_FIELDS = {
+    "organization_name", "storage_key", "collection_name", "admin_user_id",
+    "connection", "created_at", "updated_at",
+}
+
+
+def _encode_list_cursor(order: str, org: dict) -> str:
+    value = org[order]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"order": order, "value": value, "id": str(org["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_list_cursor(cursor: str, order: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = payload["value"]
+        if payload["order"] != order:
+            raise ValueError("cursor was issued for a different ordering")
+        if order == "created_at":
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 class OrgService:
     @staticmethod
     async def create_organization(request: OrgCreateRequest) -> OrgResponse:
-        print(f"DEBUG: Starting create_organization for {request.organization_name}")
+        logger.debug("Starting create_organization for %s", request.organization_name)
         # 1. Validate Uniqueness
-        existing = await master_repo.get_org_by_name(request.organization_name)
-        if existing:
-            raise HTTPException(status_code=409, detail="Organization already exists")
+        # The unique index on organization_name is the real guard; the read
+        # is only kept until this process has seen that index in place.
+        if not is_index_ready("organizations", "organization_name_unique"):
+            existing = await master_repo.get_org_by_name(request.organization_name)
+            if existing:
+                raise HTTPException(status_code=409, detail="Organization already exists")
 
         # 2. Prepare Data
-        collection_name = await get_tenant_collection_name(request.organization_name)
-        
-        # 3. Create Tenant Collection
-        db = await get_master_db()
-        try:
-            await db.create_collection(collection_name)
-            print(f"DEBUG: Created collection {collection_name}")
-        except Exception as e:
-            print(f"DEBUG: Collection creation skipped or failed: {e}")
-        
-        # 4. Create Org Metadata
+        # Hash before any write so a saturated hasher can't leave a half-created org
+        password_hash = await get_password_hash_async(request.password)
+        org_doc, admin_doc = await OrgService._build_documents(request, password_hash)
+        org_object_id, admin_object_id = org_doc["_id"], admin_doc["_id"]
+
+        # 3. Claim a pre-created collection on the org's target if the warm
+        # pool has one; otherwise create it alongside the metadata write
+        pooled = await tenant_pool.claim(org_doc["connection"])
+        if pooled:
+            org_doc["storage_key"] = org_doc["collection_name"] = pooled
+            org_doc["connection"]["collection_name"] = pooled
+        collection_name = org_doc["collection_name"]
+        tenant_db = tenant_router.get_database(org_doc["connection"])
+        collection_step = (
+            asyncio.sleep(0) if pooled
+            else OrgService._create_tenant_collection(tenant_db, collection_name)
+        )
+        collection_result, write_result = await asyncio.gather(
+            collection_step,
+            OrgService._write_org_and_admin(org_doc, admin_doc),
+            return_exceptions=True
+        )
+        if isinstance(collection_result, Exception):
+            logger.warning("Collection creation skipped or failed: %s", collection_result)
+        if isinstance(write_result, Exception):
+            # The metadata never committed; don't leave the collection behind
+            if not isinstance(collection_result, Exception):
+                await tenant_db.drop_collection(collection_name)
+            if isinstance(write_result, DuplicateKeyError):
+                # Lost a race with a concurrent create; the unique indexes decide
+                raise HTTPException(status_code=409, detail=_duplicate_detail(write_result.details))
+            logger.error("Failed to create organization: %s", write_result)
+            raise HTTPException(status_code=500, detail=f"Failed to create organization: {str(write_result)}")
+        logger.info("Created org %s with admin %s", org_object_id, admin_object_id, extra={"event": "org_created"})
+        return OrgResponse.model_validate(org_doc)
+
+    @staticmethod
+    async def bulk_create_organizations(requests: List[OrgCreateRequest]) -> List[OrgBulkCreateResult]:
+        # Same documents as create_organization, written with one insert_many
+        # per collection. Items fail individually; the rest still go through.
+        if len(requests) > settings.ORG_BULK_CREATE_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.ORG_BULK_CREATE_MAX_ITEMS} organizations per request"
+            )
+        logger.debug("Starting bulk_create_organizations for %d orgs", len(requests))
+        results = {}
+
+        def fail(index: int, status_code: int, error: str):
+            results[index] = OrgBulkCreateResult(
+                index=index,
+                organization_name=requests[index].organization_name,
+                status_code=status_code,
+                error=error
+            )
+
+        # 1. Validate Uniqueness within the batch (and against the DB until
+        # the unique index is known to exist)
+        seen_names, seen_emails = set(), set()
+        for index, request in enumerate(requests):
+            if request.organization_name in seen_names:
+                fail(index, 409, "Duplicate organization name in request")
+            elif request.email in seen_emails:
+                fail(index, 409, "Duplicate admin email in request")
+            seen_names.add(request.organization_name)
+            seen_emails.add(request.email)
+        if not is_index_ready("organizations", "organization_name_unique"):
+            existing = await master_repo.get_existing_org_names([r.organization_name for r in requests])
+            for index, request in enumerate(requests):
+                if index not in results and request.organization_name in existing:
+                    fail(index, 409, "Organization already exists")
+
+        # 2. Hash passwords in parallel, no wider than the hash pool so
+        # logins keep their share of the pending-job budget
+        hash_slots = asyncio.Semaphore(hash_pool_size())
+
+        async def hash_password(index: int):
+            async with hash_slots:
+                try:
+                    return index, await get_password_hash_async(requests[index].password)
+                except PasswordHasherBusy:
+                    return index, None
+
+        pending = [index for index in range(len(requests)) if index not in results]
+        # positions[i] is the request index of org_docs[i]
+        positions, org_docs, admin_docs = [], [], []
+        for index, password_hash in await asyncio.gather(*(hash_password(i) for i in pending)):
+            if password_hash is None:
+                fail(index, 503, "Server is busy, please retry")
+                continue
+            org_doc, admin_doc = await OrgService._build_documents(requests[index], password_hash)
+            positions.append(index)
+            org_docs.append(org_doc)
+            admin_docs.append(admin_doc)
+
+        # 3. Create Tenant Collections (bounded) and Org/Admin Metadata concurrently
+        # (not from the warm pool, which is sized for one-at-a-time signups)
+        collection_slots = asyncio.Semaphore(max(1, settings.ORG_BULK_COLLECTION_CONCURRENCY))
+
+        async def create_collection(org_doc: dict) -> bool:
+            async with collection_slots:
+                try:
+                    await OrgService._create_tenant_collection(
+                        tenant_router.get_database(org_doc["connection"]), org_doc["collection_name"]
+                    )
+                    return True
+                except Exception as e:
+                    logger.warning("Collection creation skipped or failed: %s", e)
+                    return False
+
+        async def drop_collection(org_doc: dict):
+            async with collection_slots:
+                await tenant_router.get_collection(org_doc).drop()
+
+        write_errors, *created = await asyncio.gather(
+            master_repo.create_orgs_with_admins(org_docs, admin_docs),
+            *(create_collection(org_doc) for org_doc in org_docs),
+            return_exceptions=True
+        )
+        if isinstance(write_errors, Exception):
+            # The metadata writes were undone; drop the collections made for them
+            await asyncio.gather(
+                *(drop_collection(org_doc) for org_doc, made in zip(org_docs, created) if made is True),
+                return_exceptions=True
+            )
+            raise write_errors
+
+        # 4. Collect per-item results; failed metadata writes don't keep their collection
+        orphaned = []
+        for position, org_doc in enumerate(org_docs):
+            index = positions[position]
+            error = write_errors.get(position)
+            if error is None:
+                results[index] = OrgBulkCreateResult(
+                    index=index,
+                    organization_name=org_doc["organization_name"],
+                    status_code=201,
+                    organization=OrgResponse.model_validate(org_doc)
+                )
+                continue
+            if created[position]:
+                orphaned.append(org_doc)
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                fail(index, 409, _duplicate_detail(error))
+            else:
+                fail(index, 500, f"Failed to create organization: {error.get('errmsg')}")
+        await asyncio.gather(*(drop_collection(org_doc) for org_doc in orphaned))
+
+        logger.info("Bulk created %d of %d orgs", len(org_docs) - len(write_errors), len(requests))
+        return [results[index] for index in range(len(requests))]
+
+    @staticmethod
+    async def _create_tenant_collection(tenant_db, collection_name: str):
+        # Tenants start with the template indexes, built while still empty
+        await tenant_db.create_collection(collection_name)
+        await apply_tenant_indexes(tenant_db[collection_name])
+
+    @staticmethod
+    async def _build_documents(request: OrgCreateRequest, password_hash: str):
+        # Both ids are fixed up front so the org can point at its admin from
+        # the first write; the storage key never changes on rename
+        org_object_id = ObjectId()
+        admin_object_id = ObjectId()
+        collection_name = await get_tenant_storage_key(str(org_object_id))
+        placement = await tenant_router.place(str(org_object_id))
+
+        now = datetime.utcnow()
         org_doc = {
+            "_id": org_object_id,
             "organization_name": request.organization_name,
+            "storage_key": collection_name,
             "collection_name": collection_name,
             "connection": {
-                "db_name": settings.MASTER_DB_NAME,
+                **placement,
                 "collection_name": collection_name,
                 "extra": {}
             },
-            "admin_user_id": None,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "admin_user_id": admin_object_id,
+            "created_at": now,
+            "updated_at": now
         }
-        
-        org_id = await master_repo.create_org(org_doc)
-        print(f"DEBUG: Created org with ID {org_id}")
-
-        # 5. Create Admin
-        try:
-            admin_doc = {
-                "organization_id": ObjectId(org_id),
-                "email": request.email,
-                "password_hash": get_password_hash(request.password),
-                "role": "admin",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            admin_id = await master_repo.create_admin(admin_doc)
-            print(f"DEBUG: Created admin with ID {admin_id}")
-        except Exception as e:
-            print(f"DEBUG: Failed to create admin: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to create admin: {str(e)}")
-
-        # 6. Link Admin to Org
-        try:
-            await master_repo.update_org_admin_id(org_id, admin_id)
-            print("DEBUG: Linked admin to org")
-        except Exception as e:
-            print(f"DEBUG: Failed to link admin: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to link admin: {str(e)}")
-
-        return OrgResponse(
-            id=org_id,
-            organization_name=request.organization_name,
-            collection_name=org_doc["collection_name"],
-            admin_user_id=admin_id,
-            created_at=org_doc["created_at"],
-            connection=OrgConnectionResponse(**org_doc["connection"])
-        )
+        admin_doc = {
+            "_id": admin_object_id,
+            "organization_id": org_object_id,
+            "email": request.email,
+            "password_hash": password_hash,
+            "role": "admin",
+            "created_at": now,
+            "updated_at": now
+        }
+        return org_doc, admin_doc
 
     @staticmethod
-    async def get_organization(organization_name: str) -> OrgResponse:
+    async def _write_org_and_admin(org_doc: dict, admin_doc: dict):
+        mode = settings.ORG_PROVISIONING_MODE
+        if mode == "auto":
+            capabilities = await db_client.get_capabilities()
+            use_transaction = capabilities.get("transactions", supports_transactions(capabilities))
+        else:
+            use_transaction = mode == "transaction"
+
+        if use_transaction:
+            try:
+                return await master_repo.create_org_with_admin(org_doc, admin_doc, use_transaction=True)
+            except OperationFailure as e:
+                if e.code not in TRANSACTION_UNSUPPORTED_ERROR_CODES or mode != "auto":
+                    raise
+                logger.warning("Transactions unavailable, provisioning without one: %s", e)
+                if e.code == ILLEGAL_OPERATION:
+                    capabilities = await db_client.get_capabilities()
+                    capabilities["transactions"] = False
+        return await master_repo.create_org_with_admin(org_doc, admin_doc, use_transaction=False)
+
+    @staticmethod
+    async def get_organization_doc(organization_name: str) -> dict:
+        # The cached document itself; callers must not mutate it
         org = await master_repo.get_org_by_name(organization_name)
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found")
-        
-        return OrgResponse(
-            id=str(org["_id"]),
-            organization_name=org["organization_name"],
-            collection_name=org["collection_name"],
-            admin_user_id=str(org["admin_user_id"]),
-            created_at=org["created_at"],
-            connection=OrgConnectionResponse(**org["connection"])
+        return org
+
+    @staticmethod
+    async def get_organization(organization_name: str) -> OrgResponse:
+        return OrgResponse.model_validate(await OrgService.get_organization_doc(organization_name))
+
+    @staticmethod
+    async def list_organizations(limit: int, cursor: str = None, name_prefix: str = None,
+                                 created_after: datetime = None, created_before: datetime = None,
+                                 fields: List[str] = None) -> dict:
+        # Pages through orgs by name when filtering on a name prefix (so the
+        # name index serves both), otherwise by creation time.
+        order = "organization_name" if name_prefix else "created_at"
+        fields = fields or sorted(ORG_LIST_FIELDS)
+        unknown = set(fields) - ORG_LIST_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        after = _decode_list_cursor(cursor, order) if cursor else None
+        # The sort key is always fetched so the next cursor can be built
+        projection = {field: 1 for field in fields}
+        projection[order] = 1
+        # One extra row tells whether another page exists
+        orgs = await master_repo.list_orgs(
+            limit + 1, order, after,
+            name_prefix=name_prefix.lower() if name_prefix else None,
+            created_after=created_after,
+            created_before=created_before,
+            projection=projection
+        )
+
+        next_cursor = None
+        if len(orgs) > limit:
+            orgs = orgs[:limit]
+            next_cursor = _encode_list_cursor(order, orgs[-1])
+
+        items = []
+        for org in orgs:
+            item = {"id": str(org["_id"])}
+            for field in fields:
+                if field in org:
+                    value = org[field]
+                    item[field] = str(value) if isinstance(value, ObjectId) else value
+            items.append(item)
+        return {"organizations": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    async def rename_organization(org_id: str, new_organization_name: str):
+        # Returns a job id when the org still uses a legacy name-keyed
+        # collection and its data has to be moved first, otherwise None.
+        org = await master_repo.get_org_by_id(org_id)
+        if not org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+
+        if org.get("storage_key"):
+            try:
+                await master_repo.update_org_metadata(
+                    org_id,
+                    {"organization_name": new_organization_name, "updated_at": datetime.utcnow()}
+                )
+            except DuplicateKeyError:
+                raise HTTPException(status_code=409, detail="New organization name already exists")
+            return None
+
+        if await job_repo.get_active_job(org_id, "org_migration"):
+            raise HTTPException(status_code=409, detail="A rename is already in progress for this organization")
+
+        return await job_runner.submit(
+            "org_migration",
+            org_id,
+            {
+                "old_organization_name": org["organization_name"],
+                "new_organization_name": new_organization_name,
+            }
         )
 
     @staticmethod
@@ -102,14 +383,12 @@ class OrgService:
         if str(org["_id"]) != current_admin_org_id:
             raise HTTPException(status_code=403, detail="You are not authorized to delete this organization")
 
-        # Delete Tenant Collection
-        db = await get_master_db()
-        await db.drop_collection(org["collection_name"])
-
-        # Delete Admins
-        await master_repo.delete_admins_by_org_id(str(org["_id"]))
-
-        # Delete Org Metadata
-        await master_repo.delete_org(str(org["_id"]))
+        if settings.ORG_DELETE_MODE == "immediate":
+            # Tenant collection and admins concurrently, metadata last
+            await org_reaper.purge(org)
+            return {"ok": True, "message": "Organization and related data deleted."}
 
-        return {"ok": True, "message": "Organization and related data deleted."}
+        # Soft delete: invisible from here on, data removed by the reaper
+        await master_repo.mark_org_deleted(str(org["_id"]), org["organization_name"])
+        org_reaper.wakeup.set()
+        return {"ok": True, "message": "Organization deleted. Related data is removed in the background."}
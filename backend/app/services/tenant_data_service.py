@@ -0,0 +1,464 @@
+from fastapi import HTTPException
+from app.db.master_repo import master_repo
+from app.db.tenant_router import tenant_router
+from app.core.config import settings
+from bson import ObjectId, json_util
+from bson.codec_options import CodecOptions
+from bson.errors import BSONError
+from bson.raw_bson import RawBSONDocument
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, ExecutionTimeout, OperationFailure
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+# Largest document MongoDB accepts, plus room for a trailing newline/escaping
+MAX_DOCUMENT_BYTES = 16 * 1024 * 1024 + 16 * 1024
+
+TRANSFER_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "bson": "application/bson",
+}
+
+# Most recent exports/imports, newest last, for /ops/transfers
+recent_transfers: deque = deque(maxlen=50)
+
+# Operators that run server-side JavaScript; never accepted from clients
+FORBIDDEN_OPERATORS = {"$where", "$function", "$accumulator"}
+
+# Raw documents skip decoding entirely; BSON export copies bytes as stored
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+def _record_transfer(kind: str, org_id: str, fmt: str, documents: int, size: int, started: float, **extra) -> dict:
+    seconds = time.perf_counter() - started
+    stats = {
+        "kind": kind,
+        "organization_id": org_id,
+        "format": fmt,
+        "documents": documents,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(documents / seconds, 1) if seconds else None,
+        "mb_per_sec": round(size / seconds / 1_000_000, 2) if seconds else None,
+        "finished_at": datetime.utcnow(),
+        **extra,
+    }
+    recent_transfers.append(stats)
+    logger.info(
+        "%s of org %s (%s): %d docs, %d bytes in %ss", kind, org_id, fmt, documents, size, stats["seconds"],
+        extra={"event": "tenant_transfer"}
+    )
+    return stats
+
+
+class TenantDataService:
+    @staticmethod
+    async def get_authorized_org(organization_name: str, current_admin_org_id: str) -> dict:
+        org = await master_repo.get_org_by_name(organization_name)
+        if not org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        # Authorization Check: Admin calling must belong to this org
+        if str(org["_id"]) != current_admin_org_id:
+            raise HTTPException(status_code=403, detail="You are not authorized to access this organization's data")
+        return org
+
+    @staticmethod
+    def check_format(fmt: str) -> str:
+        if fmt not in TRANSFER_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'; use one of {', '.join(TRANSFER_FORMATS)}")
+        return fmt
+
+    @staticmethod
+    async def export_documents(org: dict, fmt: str) -> AsyncIterator[bytes]:
+        # Yields chunks of roughly TENANT_TRANSFER_CHUNK_BYTES. The response
+        # only pulls the next chunk once the previous one was sent, and the
+        # cursor only fetches the next batch once this one is drained, so a
+        # slow client slows the read instead of filling memory.
+        collection = tenant_router.get_collection(org).with_options(codec_options=_RAW_CODEC_OPTIONS)
+        cursor = collection.find({}, sort=[("_id", 1)], batch_size=settings.TENANT_TRANSFER_BATCH_SIZE)
+        started = time.perf_counter()
+        documents, size = 0, 0
+        chunk, chunk_size = [], 0
+        try:
+            async for doc in cursor:
+                if fmt == "bson":
+                    data = doc.raw
+                else:
+                    # Canonical mode keeps int/long/double and dates apart,
+                    # so an export imports back with the same types
+                    data = json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode() + b"\n"
+                chunk.append(data)
+                chunk_size += len(data)
+                documents += 1
+                if chunk_size >= settings.TENANT_TRANSFER_CHUNK_BYTES:
+                    size += chunk_size
+                    yield b"".join(chunk)
+                    chunk, chunk_size = [], 0
+            if chunk:
+                size += chunk_size
+                yield b"".join(chunk)
+        finally:
+            await cursor.close()
+            _record_transfer("export", str(org["_id"]), fmt, documents, size, started)
+
+    @staticmethod
+    async def import_documents(org: dict, body: AsyncIterator[bytes], fmt: str, skip_duplicates: bool = True) -> dict:
+        # Parses the body as it arrives and writes unordered insert_many
+        # batches, with at most TENANT_IMPORT_CONCURRENCY batches in flight.
+        # Reading stops while the window is full, which pushes back on the
+        # upload, so memory is bounded by the batch limits, not the body.
+        _check_writable(org)
+        collection = tenant_router.get_collection(org)
+        parse = _parse_bson if fmt == "bson" else _parse_ndjson
+        started = time.perf_counter()
+        inserted, duplicates, size = 0, 0, 0
+        in_flight = deque()
+
+        async def complete_oldest():
+            nonlocal inserted, duplicates
+            batch_inserted, batch_duplicates = await in_flight.popleft()
+            inserted += batch_inserted
+            duplicates += batch_duplicates
+
+        async def submit(batch: list):
+            if len(in_flight) >= max(1, settings.TENANT_IMPORT_CONCURRENCY):
+                await complete_oldest()
+            in_flight.append(asyncio.create_task(_insert_batch(collection, batch, skip_duplicates)))
+
+        async def counted(chunks):
+            nonlocal size
+            async for data in chunks:
+                size += len(data)
+                yield data
+
+        try:
+            batch, batch_bytes = [], 0
+            async for doc, doc_bytes in parse(counted(body)):
+                batch.append(doc)
+                batch_bytes += doc_bytes
+                if len(batch) >= settings.TENANT_TRANSFER_BATCH_SIZE or batch_bytes >= settings.TENANT_IMPORT_BATCH_BYTES:
+                    await submit(batch)
+                    batch, batch_bytes = [], 0
+            if batch:
+                await submit(batch)
+            while in_flight:
+                await complete_oldest()
+        except (ValueError, TypeError, KeyError, ArithmeticError, BSONError) as e:
+            # Framing errors plus whatever json_util raises on malformed
+            # Extended JSON ($oid, $binary, $numberDecimal, ...)
+            raise HTTPException(status_code=400, detail=f"Invalid {fmt} body after {inserted} documents: {e}")
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        return _record_transfer(
+            "import", str(org["_id"]), fmt, inserted, size, started, duplicates_skipped=duplicates
+        )
+
+    @staticmethod
+    async def insert_documents(org: dict, documents: list) -> dict:
+        # Unordered, so one bad document doesn't stop the rest; each failure
+        # is reported by its position in the request
+        _check_writable(org)
+        collection = tenant_router.get_collection(org)
+        decoded = [_from_extended_json(doc) for doc in documents]
+        errors = []
+        try:
+            await collection.insert_many(decoded, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                errors.append({
+                    "index": err["index"],
+                    "status_code": 409 if err.get("code") == DUPLICATE_KEY_ERROR else 500,
+                    "error": err.get("errmsg"),
+                })
+        except (BSONError, OverflowError) as e:
+            # Rejected by the encoder before anything was sent
+            raise HTTPException(status_code=400, detail=f"Invalid document: {e}")
+        failed = {err["index"] for err in errors}
+        # insert_many fills in _id on every document it was handed
+        return {
+            "inserted_ids": [_to_json(doc["_id"]) for i, doc in enumerate(decoded) if i not in failed],
+            "errors": errors,
+        }
+
+    @staticmethod
+    async def get_document(org: dict, doc_id: str) -> dict:
+        doc = await tenant_router.get_collection(org).find_one({"_id": _parse_doc_id(doc_id)})
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return _to_json(doc)
+
+    @staticmethod
+    async def update_document(org: dict, doc_id: str, set_fields: dict, unset_fields: list) -> dict:
+        if "_id" in set_fields or "_id" in unset_fields:
+            raise HTTPException(status_code=400, detail="_id cannot be modified")
+        _check_writable(org)
+        update = {}
+        if set_fields:
+            update["$set"] = _from_extended_json(set_fields)
+        if unset_fields:
+            update["$unset"] = {field: "" for field in unset_fields}
+        if not update:
+            raise HTTPException(status_code=400, detail="Nothing to update")
+        doc = await tenant_router.get_collection(org).find_one_and_update(
+            {"_id": _parse_doc_id(doc_id)}, update, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return _to_json(doc)
+
+    @staticmethod
+    async def delete_document(org: dict, doc_id: str):
+        _check_writable(org)
+        result = await tenant_router.get_collection(org).delete_one({"_id": _parse_doc_id(doc_id)})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Document not found")
+
+    @staticmethod
+    def prepare_query(query) -> dict:
+        # Shared by paged and streamed queries: decoded filter, sort spec
+        # with the _id tie-breaker, and a projection that keeps sort keys
+        filter_ = _from_extended_json(query.filter)
+        _check_operators(filter_)
+        sort = [(field, 1 if direction >= 0 else -1) for field, direction in query.sort.items() if field != "_id"]
+        sort.append(("_id", -1 if query.sort.get("_id", 1) < 0 else 1))
+
+        projection, hidden = None, []
+        if query.projection:
+            projection = dict(query.projection)
+            inclusive = any(value for field, value in projection.items() if field != "_id")
+            for field, _ in sort:
+                if inclusive and not projection.get(field):
+                    projection[field] = 1
+                    hidden.append(field)
+                elif not inclusive and field in projection:
+                    del projection[field]
+                    hidden.append(field)
+
+        fingerprint = hashlib.sha256(
+            json_util.dumps({"filter": filter_, "sort": sort, "projection": query.projection}, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return {"filter": filter_, "sort": sort, "projection": projection, "hidden": hidden, "fingerprint": fingerprint}
+
+    @staticmethod
+    async def query_documents(org: dict, query) -> dict:
+        # Keyset pagination over the requested sort: the continuation holds
+        # the last document's sort values, so each page starts with an index
+        # seek (given an index on the sort) rather than skipping earlier pages.
+        # Exact for sort fields that hold one BSON type across documents.
+        spec = TenantDataService.prepare_query(query)
+        filter_ = spec["filter"]
+        if query.continuation:
+            after = _decode_continuation(query.continuation, spec["fingerprint"], len(spec["sort"]))
+            filter_ = {"$and": [filter_, _keyset_filter(spec["sort"], after)]} if filter_ else _keyset_filter(spec["sort"], after)
+
+        cursor = tenant_router.get_collection(org).find(
+            filter_, spec["projection"], sort=spec["sort"], limit=query.limit + 1,
+            max_time_ms=settings.TENANT_QUERY_MAX_TIME_MS,
+            **({"batch_size": query.batch_size} if query.batch_size else {})
+        )
+        try:
+            docs = await cursor.to_list(length=query.limit + 1)
+        except ExecutionTimeout:
+            raise HTTPException(status_code=504, detail="Query exceeded its time limit; narrow the filter or add an index")
+        except OperationFailure as e:
+            raise HTTPException(status_code=400, detail=f"Invalid query: {e}")
+
+        continuation = None
+        if len(docs) > query.limit:
+            docs = docs[:query.limit]
+            continuation = _encode_continuation(spec["fingerprint"], [_get_path(docs[-1], field) for field, _ in spec["sort"]])
+        return {
+            "documents": [_to_json(_strip(doc, spec["hidden"])) for doc in docs],
+            "next_continuation": continuation,
+        }
+
+    @staticmethod
+    async def stream_documents(org: dict, query) -> AsyncIterator[bytes]:
+        # Every match as NDJSON, pulled through the cursor batch by batch
+        spec = TenantDataService.prepare_query(query)
+        cursor = tenant_router.get_collection(org).find(
+            spec["filter"], spec["projection"], sort=spec["sort"],
+            **({"batch_size": query.batch_size} if query.batch_size else {})
+        )
+        chunk, chunk_size = [], 0
+        try:
+            async for doc in cursor:
+                data = json_util.dumps(_strip(doc, spec["hidden"])).encode() + b"\n"
+                chunk.append(data)
+                chunk_size += len(data)
+                if chunk_size >= settings.TENANT_TRANSFER_CHUNK_BYTES:
+                    yield b"".join(chunk)
+                    chunk, chunk_size = [], 0
+            if chunk:
+                yield b"".join(chunk)
+        finally:
+            await cursor.close()
+
+
+async def _insert_batch(collection, batch: list, skip_duplicates: bool) -> tuple:
+    try:
+        result = await collection.insert_many(batch, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if not skip_duplicates or any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+            raise HTTPException(
+                status_code=409 if errors and errors[0].get("code") == DUPLICATE_KEY_ERROR else 500,
+                detail=f"Import failed: {errors[0].get('errmsg') if errors else e}"
+            )
+        return e.details.get("nInserted", 0), len(errors)
+
+
+async def _parse_ndjson(chunks: AsyncIterator[bytes]):
+    # One Extended JSON document per line; blank lines are ignored
+    pending = b""
+    async for data in chunks:
+        pending += data
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        if len(pending) > MAX_DOCUMENT_BYTES:
+            raise ValueError("line exceeds the maximum document size")
+        for line in lines:
+            if line.strip():
+                yield json_util.loads(line), len(line)
+    if pending.strip():
+        yield json_util.loads(pending), len(pending)
+
+
+async def _parse_bson(chunks: AsyncIterator[bytes]):
+    # Concatenated BSON documents (the mongodump .bson layout); each one is
+    # handed to the driver as raw bytes without decoding
+    pending = bytearray()
+    async for data in chunks:
+        pending += data
+        offset = 0
+        while len(pending) - offset >= 4:
+            length = int.from_bytes(pending[offset:offset + 4], "little")
+            if length < 5 or length > MAX_DOCUMENT_BYTES:
+                raise ValueError(f"invalid document length {length}")
+            if len(pending) - offset < length:
+                break
+            raw = bytes(pending[offset:offset + length])
+            if raw[-1] != 0:
+                # Every BSON document ends in a NUL; the server validates the rest
+                raise ValueError("malformed document")
+            yield RawBSONDocument(raw), length
+            offset += length
+        del pending[:offset]
+    if pending:
+        raise ValueError("body ends in the middle of a document")
+
+
+def _check_writable(org: dict):
+    # Set while the tenant's collection is copied to a new placement; a
+    # write to the source then would miss the copy and be lost
+    if org.get("migrating"):
+        raise HTTPException(
+            status_code=503,
+            detail="Organization data is being moved; retry shortly",
+            headers={"Retry-After": str(max(1, int(settings.ORG_CACHE_TTL_SECONDS + settings.TENANT_MOVE_FENCE_GRACE_SECONDS)))},
+        )
+
+
+def _from_extended_json(value):
+    # Request bodies arrive as plain JSON; this turns {"$oid": ...},
+    # {"$date": ...} etc. into their BSON types
+    try:
+        return json_util.loads(json.dumps(value))
+    except (ValueError, TypeError, KeyError, ArithmeticError, BSONError) as e:
+        # A malformed $oid, $date, $numberLong, ... is the client's mistake
+        raise HTTPException(status_code=400, detail=f"Invalid Extended JSON: {e}")
+
+
+def _to_json(value):
+    return json.loads(json_util.dumps(value))
+
+
+def _check_operators(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in FORBIDDEN_OPERATORS:
+                raise HTTPException(status_code=400, detail=f"Operator {key} is not allowed")
+            _check_operators(item)
+    elif isinstance(value, list):
+        for item in value:
+            _check_operators(item)
+
+
+def _parse_doc_id(doc_id: str):
+    return ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+
+
+def _get_path(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _strip(doc: dict, fields: list) -> dict:
+    # Removes sort keys that were only fetched to build the continuation
+    for field in fields:
+        *parents, last = field.split(".")
+        target = doc
+        for part in parents:
+            target = target.get(part) if isinstance(target, dict) else None
+        if isinstance(target, dict):
+            target.pop(last, None)
+            if parents and not target:
+                # Drop the container too if only the hidden key put it there
+                _strip(doc, [".".join(parents)])
+    return doc
+
+
+def _keyset_filter(sort: list, after: list) -> dict:
+    # Documents strictly after `after` in sort order: equal on every earlier
+    # key and beyond it on this one, for each key in turn. null/missing
+    # sorts before any value, so it is the start of an ascending key and the
+    # tail of a descending one.
+    branches = []
+    for index, (field, direction) in enumerate(sort):
+        value = after[index]
+        branch = {f: after[i] for i, (f, _) in enumerate(sort[:index])}
+        if value is None:
+            if direction < 0:
+                continue
+            branch[field] = {"$ne": None}
+        elif direction > 0:
+            branch[field] = {"$gt": value}
+        else:
+            branch["$or"] = [{field: {"$lt": value}}, {field: None}]
+        branches.append(branch)
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}
+
+
+def _encode_continuation(fingerprint: str, values: list) -> str:
+    payload = json_util.dumps({"q": fingerprint, "v": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_continuation(token: str, fingerprint: str, keys: int) -> list:
+    # Shape checks sit in the try too, so a tampered token is a 400
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode()))
+        fingerprint_in_token, values = payload["q"], payload["v"]
+        if not isinstance(values, list) or len(values) != keys:
+            raise ValueError("one value per sort key expected")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    if fingerprint_in_token != fingerprint:
+        raise HTTPException(status_code=400, detail="Continuation token belongs to a different query")
+    return values
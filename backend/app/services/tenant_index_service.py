@@ -0,0 +1,94 @@
+from app.db.master_repo import master_repo
+from app.db.tenant_router import tenant_router
+from app.db.tenant_indexes import TENANT_INDEX_TEMPLATES, apply_tenant_indexes, tenant_index_drift
+from app.core.config import settings
+from bson import ObjectId
+import asyncio
+
+# Orgs fetched from the master DB per page while walking every tenant
+PAGE_SIZE = 100
+# Failures kept in a rollout result
+MAX_REPORTED_FAILURES = 100
+
+_TENANT_PROJECTION = {"organization_name": 1, "collection_name": 1, "connection": 1}
+
+
+class TenantIndexService:
+    @staticmethod
+    async def drift_report(limit: int = 100, after_id: str = None) -> dict:
+        # Checks up to `limit` tenants in _id order and lists the ones missing
+        # template indexes; next_after continues from where this page stopped.
+        orgs = await master_repo.list_orgs(
+            limit, "_id", (ObjectId(after_id),) if after_id else None, projection=_TENANT_PROJECTION
+        )
+        slots = asyncio.Semaphore(max(1, settings.TENANT_INDEX_ROLLOUT_CONCURRENCY))
+
+        async def check(org: dict):
+            async with slots:
+                try:
+                    drift = await tenant_index_drift(tenant_router.get_collection(org))
+                except Exception as e:
+                    drift = {"missing": [], "error": str(e)}
+            return org, drift
+
+        tenants = []
+        for org, drift in await asyncio.gather(*(check(org) for org in orgs)):
+            if drift["missing"] or drift.get("error"):
+                tenants.append({"organization_id": str(org["_id"]), "organization_name": org["organization_name"], **drift})
+        return {
+            "templates": [model.document["name"] for model in TENANT_INDEX_TEMPLATES],
+            "checked": len(orgs),
+            "drifted": tenants,
+            "next_after": str(orgs[-1]["_id"]) if len(orgs) == limit else None,
+        }
+
+    @staticmethod
+    async def rollout(progress=None, after_id=None, processed: int = 0, checkpoint=None) -> dict:
+        # Walks every tenant and builds missing template indexes. Tenants that
+        # already match are only inspected; each build is followed by a pause
+        # so a rollout doesn't stack index builds on a busy cluster.
+        total = await master_repo.count_orgs()
+        if progress:
+            await progress(processed, total)
+        slots = asyncio.Semaphore(max(1, settings.TENANT_INDEX_ROLLOUT_CONCURRENCY))
+        built, failures = 0, []
+
+        async def roll(org: dict):
+            nonlocal built
+            async with slots:
+                try:
+                    # Inside the try: an org on a removed cluster fails alone
+                    collection = tenant_router.get_collection(org)
+                    if not (await tenant_index_drift(collection))["missing"]:
+                        return
+                    results = await apply_tenant_indexes(collection)
+                except Exception as e:
+                    results = {"*": f"failed: {e}"}
+                built += 1
+                for name, outcome in results.items():
+                    if outcome != "ok":
+                        failures.append({"organization_id": str(org["_id"]), "index": name, "error": outcome})
+                await asyncio.sleep(settings.TENANT_INDEX_ROLLOUT_PAUSE_SECONDS)
+
+        after = (ObjectId(after_id),) if after_id else None
+        while TENANT_INDEX_TEMPLATES:
+            orgs = await master_repo.list_orgs(PAGE_SIZE, "_id", after, projection=_TENANT_PROJECTION)
+            if not orgs:
+                break
+            await asyncio.gather(*(roll(org) for org in orgs))
+            processed += len(orgs)
+            after = (orgs[-1]["_id"],)
+            if checkpoint:
+                await checkpoint(orgs[-1]["_id"], processed)
+            if progress:
+                await progress(processed)
+        if progress:
+            await progress(processed, total)
+
+        return {
+            "templates": [model.document["name"] for model in TENANT_INDEX_TEMPLATES],
+            "tenants": processed,
+            "tenants_built": built,
+            "failed": len(failures),
+            "failures": failures[:MAX_REPORTED_FAILURES],
+        }
@@ -0,0 +1,111 @@
+from app.db.client import get_tenant_storage_key
+from app.db.tenant_pool_repo import tenant_pool_repo
+from app.db.tenant_router import tenant_router
+from app.db.tenant_indexes import TENANT_INDEX_TEMPLATES, apply_tenant_indexes
+from app.core.config import settings
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _template_names() -> list:
+    return [model.document["name"] for model in TENANT_INDEX_TEMPLATES]
+
+
+class TenantPool:
+    # Keeps spare, already-indexed tenant collections on every placement
+    # target, so a signup claims one instead of waiting on create_collection
+    # and the template index builds. Every process tops the pool up; the
+    # overshoot from racing refills is at most one refill per process.
+    def __init__(self):
+        self.task: asyncio.Task = None
+        self.wakeup = asyncio.Event()
+
+    def enabled(self) -> bool:
+        return settings.TENANT_POOL_LOW_WATER > 0
+
+    async def start(self):
+        if self.task or not self.enabled():
+            return
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def claim(self, placement: dict) -> str:
+        # Returns the name of an empty collection on the placement's target,
+        # or None when the pool is disabled or has run dry there
+        if not self.enabled():
+            return None
+        spare = await tenant_pool_repo.claim_spare(placement["cluster"], placement["db_name"])
+        self.wakeup.set()
+        if spare is None:
+            return None
+        if spare.get("templates") != _template_names():
+            # Built before the templates last changed; still empty, so cheap
+            await apply_tenant_indexes(tenant_router.get_database(placement)[spare["collection_name"]])
+        return spare["collection_name"]
+
+    async def refill(self) -> dict:
+        added = {}
+        for cluster, db_name in tenant_router.targets():
+            spares = await tenant_pool_repo.count_spares(cluster, db_name)
+            if spares >= settings.TENANT_POOL_LOW_WATER:
+                continue
+            wanted = max(settings.TENANT_POOL_SIZE, settings.TENANT_POOL_LOW_WATER) - spares
+            for _ in range(wanted):
+                await self._add_spare(cluster, db_name)
+            added[f"{cluster}/{db_name}"] = wanted
+        return added
+
+    async def stats(self) -> dict:
+        targets = {}
+        for cluster, db_name in tenant_router.targets():
+            targets[f"{cluster}/{db_name}"] = await tenant_pool_repo.count_spares(cluster, db_name)
+        return {
+            "enabled": self.enabled(),
+            "low_water": settings.TENANT_POOL_LOW_WATER,
+            "size": settings.TENANT_POOL_SIZE,
+            "spares": targets,
+        }
+
+    async def _add_spare(self, cluster: str, db_name: str):
+        # The spare's own id names the collection; whichever org claims it
+        # keeps that name as its storage key
+        spare_id = ObjectId()
+        collection_name = await get_tenant_storage_key(str(spare_id))
+        tenant_db = tenant_router.get_database({"cluster": cluster, "db_name": db_name})
+        await tenant_db.create_collection(collection_name)
+        results = await apply_tenant_indexes(tenant_db[collection_name])
+        await tenant_pool_repo.add_spare({
+            "_id": spare_id,
+            "cluster": cluster,
+            "db_name": db_name,
+            "collection_name": collection_name,
+            "templates": [name for name, outcome in results.items() if outcome == "ok"],
+            "created_at": datetime.utcnow(),
+        })
+
+    async def _refill_loop(self):
+        while True:
+            self.wakeup.clear()
+            try:
+                added = await self.refill()
+                if added:
+                    logger.info("Refilled tenant pool: %s", added)
+            except Exception as e:
+                logger.warning("Tenant pool refill failed: %s", e)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.TENANT_POOL_CHECK_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+tenant_pool = TenantPool()
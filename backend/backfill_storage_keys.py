@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import sys
+from app.db.client import db_client, get_master_db
+from app.db.tenant_router import tenant_router
+from app.services.migration_service import MigrationService
+
+# One-time backfill: moves every org still stored in a name-keyed collection
+# (org_<name>) onto its immutable storage key (org_<ObjectId>).
+#
+#   python backfill_storage_keys.py --dry-run
+#   python backfill_storage_keys.py [--strategy rename|merge|streaming|buffered]
+
+
+async def backfill(dry_run: bool, strategy: str = None):
+    db_client.connect()
+    db = await get_master_db()
+    moved, failed = 0, 0
+    try:
+        cursor = db.organizations.find(
+            {"storage_key": {"$exists": False}, "deleted_at": None},
+            {"organization_name": 1, "collection_name": 1}
+        )
+        async for org in cursor:
+            org_id = str(org["_id"])
+            if dry_run:
+                print(f"Would move {org['collection_name']} -> org_{org_id} ({org['organization_name']})")
+                continue
+            try:
+                result = await MigrationService.perform_migration(org_id, strategy=strategy)
+                moved += 1
+                print(f"Moved {org['collection_name']} -> org_{org_id}: {result}")
+            except Exception as e:
+                failed += 1
+                print(f"ERROR: Failed to move {org['collection_name']}: {getattr(e, 'detail', e)}")
+    finally:
+        tenant_router.close()
+        db_client.close()
+
+    if not dry_run:
+        print(f"Backfill finished: {moved} moved, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign stable storage keys to legacy organizations")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--strategy", default=None)
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    ok = asyncio.run(backfill(args.dry_run, args.strategy))
+    sys.exit(0 if ok else 1)
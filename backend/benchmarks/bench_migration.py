@@ -0,0 +1,104 @@
+"""Compare client-side and server-side rename migration strategies.
+
+Seeds a synthetic tenant collection in ``<MASTER_DB_NAME>_bench`` and copies it
+with each strategy in a separate child process, so peak RSS is measured in
+isolation. Requires a reachable MongoDB at ``MONGO_URI``.
+
+    python -m benchmarks.bench_migration --docs 1000000 --modes buffered,streaming,merge
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.migration_strategies import STRATEGIES
+
+SOURCE = "bench_migration_source"
+TARGET = "bench_migration_target"
+SEED_BATCH = 10_000
+
+
+def bench_db(client):
+    return client[f"{settings.MASTER_DB_NAME}_bench"]
+
+
+def synthetic_doc(i: int) -> dict:
+    return {
+        "seq": i,
+        "name": f"user-{i}",
+        "email": f"user-{i}@example.com",
+        "tags": ["alpha", "beta", "gamma"],
+        "payload": "x" * 256,
+    }
+
+
+async def seed(docs: int):
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = bench_db(client)
+    await db[SOURCE].drop()
+    for start in range(0, docs, SEED_BATCH):
+        end = min(start + SEED_BATCH, docs)
+        await db[SOURCE].insert_many([synthetic_doc(i) for i in range(start, end)], ordered=False)
+    client.close()
+
+
+async def run_mode(mode: str) -> dict:
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = bench_db(client)
+    await db[TARGET].drop()
+    await db.migrations.delete_many({})
+
+    checkpoint_filter = {"org_id": ObjectId(), "source": SOURCE, "target": TARGET, "status": "running"}
+    started = time.perf_counter()
+    copied = await STRATEGIES[mode].run(db[SOURCE], db[TARGET], db.migrations, checkpoint_filter)
+    elapsed = time.perf_counter() - started
+
+    await db[TARGET].drop()
+    client.close()
+    # ru_maxrss is KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "mode": mode,
+        "copied": copied,
+        "seconds": round(elapsed, 2),
+        "docs_per_sec": round(copied / elapsed) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--modes", default="buffered,streaming")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_mode(args.child))))
+        return
+
+    print(f"Seeding {args.docs} documents...")
+    asyncio.run(seed(args.docs))
+
+    results = []
+    for mode in args.modes.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_migration", "--child", mode],
+            check=True, capture_output=True, text=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'mode':<10} {'copied':>10} {'seconds':>9} {'docs/s':>10} {'peak RSS MB':>12}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['copied']:>10} {r['seconds']:>9} {r['docs_per_sec']:>10} {r['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""CPU per /org/get request: the current typed handler against the previous
+one, which rebuilt OrgResponse field by field and returned it in a plain
+dict (response_model=dict). The org is served from the lookup cache, so
+no database is needed and only the app's own work is timed.
+
+Reports the handler plus FastAPI's response serialization on their own,
+then whole requests through a bare app (in-process, no middleware),
+where the test client and routing make up most of the time. Also times
+serializing an /org/list page, which now goes out through orjson.
+
+    python -m benchmarks.bench_org_get
+    python -m benchmarks.bench_org_get --iterations 50000 --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+from fastapi.routing import serialize_response
+from httpx import ASGITransport, AsyncClient
+
+from app.api import orgs
+from app.core.responses import FastJSONResponse
+from app.db.master_repo import MasterRepository, master_repo, org_cache
+from app.schemas.org_schema import OrgConnectionResponse, OrgResponse
+
+ORG_NAME = "bench-org"
+
+
+async def previous_get_org(organization_name: str):
+    # OrgService.get_organization and the /org/get handler before typed
+    # envelopes
+    org = await master_repo.get_org_by_name(organization_name)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    org_response = OrgResponse(
+        id=str(org["_id"]),
+        organization_name=org["organization_name"],
+        storage_key=org.get("storage_key"),
+        collection_name=org["collection_name"],
+        admin_user_id=str(org["admin_user_id"]),
+        created_at=org["created_at"],
+        connection=OrgConnectionResponse(**org["connection"])
+    )
+    return {"ok": True, "organization": org_response}
+
+
+def seed_cache():
+    org_id = ObjectId()
+    now = datetime.utcnow()
+    org_cache.ttl = 24 * 3600
+    MasterRepository._cache_org(("name", ORG_NAME), {
+        "_id": org_id,
+        "organization_name": ORG_NAME,
+        "storage_key": f"org_{org_id}",
+        "collection_name": f"org_{org_id}",
+        "admin_user_id": ObjectId(),
+        "connection": {"cluster": "default", "db_name": "master_db", "collection_name": f"org_{org_id}"},
+        "created_at": now,
+        "updated_at": now,
+    }, org_cache.generation)
+
+
+async def best_of(variants: dict, iterations: int, rounds: int) -> dict:
+    # CPU microseconds per call of each variant's coroutine function; the
+    # variants take turns each round so background noise hits them alike,
+    # and the best round counts
+    best = dict.fromkeys(variants, float("inf"))
+    for _ in range(rounds):
+        for name, once in variants.items():
+            started = time.process_time()
+            for _ in range(iterations // rounds):
+                await once()
+            best[name] = min(best[name], (time.process_time() - started) / (iterations // rounds) * 1_000_000)
+    return best
+
+
+def handler_step(route):
+    # What a request spends past routing: the handler, then validating and
+    # dumping its return value to JSON bytes
+    async def once():
+        content = await route.endpoint(ORG_NAME)
+        return await serialize_response(field=route.response_field, response_content=content, dump_json=True)
+    return once
+
+
+def list_page(rows: int) -> dict:
+    now = datetime.utcnow()
+    return {"ok": True, "organizations": [
+        {"id": str(ObjectId()), "organization_name": f"{ORG_NAME}-{i}", "created_at": now, "updated_at": now}
+        for i in range(rows)
+    ], "next_cursor": None}
+
+
+async def main(args):
+    seed_cache()
+    route = next(r for r in orgs.router.routes if r.path == "/org/get")
+    app = FastAPI()
+    app.add_api_route("/previous", previous_get_org, response_model=dict)
+    app.add_api_route("/current", route.endpoint, response_model=route.response_model)
+    previous_route, current_route = app.routes[-2:]
+
+    previous_body = await handler_step(previous_route)()
+    current_body = await handler_step(current_route)()
+    if previous_body != current_body:
+        raise SystemExit(f"Responses differ:\n  {previous_body}\n  {current_body}")
+    step = await best_of(
+        {"previous": handler_step(previous_route), "current": handler_step(current_route)},
+        args.iterations, args.rounds
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        params = {"organization_name": ORG_NAME}
+        whole = await best_of({
+            "previous": lambda: client.get("/previous", params=params),
+            "current": lambda: client.get("/current", params=params),
+        }, args.requests, args.rounds)
+
+    # /org/list pages: response_model=dict serialization against
+    # FastJSONResponse, which the handler now returns
+    page = list_page(args.list_rows)
+    dict_field = previous_route.response_field
+
+    async def list_previous():
+        return await serialize_response(field=dict_field, response_content=page, dump_json=True)
+
+    async def list_current():
+        return FastJSONResponse(page).body
+    listing = await best_of({"previous": list_previous, "current": list_current}, args.list_iterations, args.rounds)
+
+    print(f"/org/get, CPU per request ({len(current_body)} byte body, best of {args.rounds} rounds)")
+    print(f"  handler + serialization: previous {step['previous']:8.2f} us, current {step['current']:8.2f} us"
+          f"  (saves {step['previous'] - step['current']:.2f} us)")
+    print(f"  whole request:           previous {whole['previous']:8.2f} us, current {whole['current']:8.2f} us"
+          f"  (saves {whole['previous'] - whole['current']:.2f} us)")
+    print(f"/org/list page of {args.list_rows} rows, serialization")
+    print(f"  previous {listing['previous']:8.2f} us, current {listing['current']:8.2f} us"
+          f"  ({listing['previous'] / listing['current']:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--list-rows", type=int, default=500)
+    parser.add_argument("--list-iterations", type=int, default=1_000)
+    asyncio.run(main(parser.parse_args()))
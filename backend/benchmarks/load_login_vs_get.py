@@ -0,0 +1,115 @@
+"""Measure /org/get latency while logins saturate the password hasher.
+
+Drives the ASGI app in-process. A probe loop calls /org/get while N clients
+hammer /admin/login; p50/p99 are reported idle and under load. ``--inline``
+runs bcrypt on the event loop (the pre-executor behaviour) for comparison.
+Requires a reachable MongoDB at ``MONGO_URI``.
+
+    python -m benchmarks.load_login_vs_get --logins 32 --seconds 10
+    python -m benchmarks.load_login_vs_get --logins 32 --seconds 10 --inline
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core import security
+from app.db.client import db_client
+from app.db.master_repo import master_repo
+from app.db.tenant_router import tenant_router
+from app.main import app
+
+PASSWORD = "BenchPassword123!"
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client: AsyncClient, org_name: str, stop: asyncio.Event, interval: float = 0.01) -> list:
+    # Latency is measured from the scheduled send time, so time spent waiting
+    # for a blocked event loop counts against the request.
+    samples = []
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        response = await client.get("/org/get", params={"organization_name": org_name})
+        samples.append((time.perf_counter() - scheduled) * 1000)
+        assert response.status_code == 200, response.text
+        scheduled += interval
+    return samples
+
+
+async def login_storm(client: AsyncClient, email: str, stop: asyncio.Event) -> int:
+    logins = 0
+    while not stop.is_set():
+        response = await client.post("/admin/login", json={"email": email, "password": PASSWORD})
+        if response.status_code == 200:
+            logins += 1
+    return logins
+
+
+async def run_phase(client, org_name, email, logins: int, seconds: float):
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, org_name, stop))
+    storm = [asyncio.create_task(login_storm(client, email, stop)) for _ in range(logins)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    samples = await probe_task
+    completed = sum(await asyncio.gather(*storm))
+    return samples, completed
+
+
+def report(label: str, samples: list, logins: int, seconds: float):
+    print(
+        f"{label:<14} probes={len(samples):>5}  p50={statistics.median(samples):7.2f}ms  "
+        f"p99={percentile(samples, 99):7.2f}ms  max={max(samples):7.2f}ms  logins/s={logins / seconds:6.1f}"
+    )
+
+
+async def main(args):
+    if args.inline:
+        # Simulate the old behaviour: bcrypt straight on the event loop
+        async def inline(fn, *fn_args):
+            return fn(*fn_args)
+        security._run_hash_job = inline
+
+    db_client.connect()
+    org_name = f"bench-{uuid.uuid4().hex[:8]}"
+    email = f"admin@{org_name}.example.com"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/org/create", json={
+            "organization_name": org_name, "email": email, "password": PASSWORD
+        })
+        assert response.status_code == 201, response.text
+        org_id = response.json()["organization"]["id"]
+        try:
+            idle, _ = await run_phase(client, org_name, email, 0, args.seconds)
+            loaded, logins = await run_phase(client, org_name, email, args.logins, args.seconds)
+        finally:
+            org = await master_repo.get_org_by_id(org_id)
+            await tenant_router.get_collection(org).drop()
+            await master_repo.delete_admins_by_org_id(org_id)
+            await master_repo.delete_org(org_id)
+
+    mode = "inline bcrypt" if args.inline else "executor bcrypt"
+    print(f"/org/get latency ({mode}, {args.logins} concurrent login clients)")
+    report("idle", idle, 0, args.seconds)
+    report("under logins", loaded, logins, args.seconds)
+    security.shutdown_hash_executor()
+    tenant_router.close()
+    db_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--inline", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,274 @@
+"""Throughput and latency of the org lifecycle, checked against baselines.
+
+Drives the ASGI app in-process through httpx. Runs against a local mongod
+when one answers at ``MONGO_URI`` (in a throwaway ``<MASTER_DB_NAME>_bench``
+database), otherwise against mongomock-motor. Mock numbers only compare
+with other mock runs. Scenarios: create, login, get, rename, and delete
+in both ORG_DELETE_MODEs. Each reports throughput and p50/p95/p99.
+Renames here are metadata-only (every org has a storage key), and a soft
+delete only marks the org; delete_immediate purges tenants holding
+--tenant-docs documents within the request.
+
+bcrypt is pinned to --salt-rounds (default 4) so hashing doesn't drown out
+the rest of the request; pass the production cost to measure it too.
+Legacy renames that copy data have their own benchmark (bench_migration).
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --backend mock --ops 400 --concurrency 16
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --check --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.security import shutdown_hash_executor
+from app.db.client import db_client
+from app.db.indexes import ensure_master_indexes
+from app.db.tenant_router import tenant_router
+from app.main import app
+
+PASSWORD = "BenchPassword123!"
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+# Figures compared against the baseline; latency may not grow and
+# throughput may not drop by more than the tolerance
+LATENCY_KEYS = ("p95_ms", "p99_ms")
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def connect(backend: str) -> str:
+    if backend in ("auto", "mongo"):
+        probe = AsyncIOMotorClient(settings.MONGO_URI, serverSelectionTimeoutMS=1000)
+        try:
+            await probe.admin.command("ping")
+            reachable = True
+        except Exception as e:
+            if backend == "mongo":
+                sys.exit(f"No MongoDB at MONGO_URI: {e}")
+            reachable = False
+        finally:
+            probe.close()
+        if reachable:
+            settings.MASTER_DB_NAME = f"{settings.MASTER_DB_NAME}_bench"
+            db_client.connect()
+            await db_client.client.drop_database(settings.MASTER_DB_NAME)
+            return "mongo"
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("No MongoDB reachable and mongomock-motor is not installed (pip install mongomock-motor)")
+    db_client.client = AsyncMongoMockClient()
+    # Nothing to probe; an in-memory standalone has no transactions
+    db_client.capabilities = {"version": (0,), "replica_set": False, "sharded": False}
+    return "mock"
+
+
+async def run_scenario(items: list, call, concurrency: int) -> dict:
+    # items are worked off by `concurrency` clients; call(item) returns the
+    # response, and anything but a 2xx counts as an error
+    samples, errors = [], 0
+    pending = iter(items)
+
+    async def worker():
+        nonlocal errors
+        for item in pending:
+            started = time.perf_counter()
+            response = await call(item)
+            samples.append((time.perf_counter() - started) * 1000)
+            if not 200 <= response.status_code < 300:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return {
+        "ops": len(samples),
+        "errors": errors,
+        "throughput": round(len(samples) / seconds, 1),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+async def seed_tenants(orgs: list, size: int):
+    documents = [{"seq": i, "name": f"user-{i}", "payload": "x" * 256} for i in range(size)]
+    for org in orgs:
+        collection = tenant_router.get_collection(org["doc"])
+        await collection.delete_many({})
+        if documents:
+            await collection.insert_many([dict(d) for d in documents], ordered=False)
+
+
+async def run_suite(client: AsyncClient, args) -> dict:
+    prefix = f"bench-{uuid.uuid4().hex[:6]}"
+    orgs = [
+        {"name": f"{prefix}-{i}", "email": f"admin{i}@{prefix}.example.com"}
+        for i in range(args.ops)
+    ]
+    results = {}
+
+    async def create(org):
+        response = await client.post("/org/create", json={
+            "organization_name": org["name"], "email": org["email"], "password": PASSWORD
+        })
+        if response.status_code == 201:
+            org["doc"] = response.json()["organization"]
+        return response
+    results["create"] = await run_scenario(orgs, create, args.concurrency)
+    orgs = [org for org in orgs if "doc" in org]
+    # The response's connection block is all get_collection needs
+    for org in orgs:
+        org["doc"] = {"connection": org["doc"]["connection"], "collection_name": org["doc"]["collection_name"]}
+
+    async def login(org):
+        response = await client.post("/admin/login", json={"email": org["email"], "password": PASSWORD})
+        if response.status_code == 200:
+            org["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+    results["login"] = await run_scenario(orgs, login, args.concurrency)
+    orgs = [org for org in orgs if "headers" in org]
+
+    async def get(org):
+        return await client.get("/org/get", params={"organization_name": org["name"]})
+    results["get"] = await run_scenario(orgs, get, args.concurrency)
+
+    renamed = orgs[:args.rename_ops]
+
+    async def rename(org):
+        new_name = f"{org['name']}-r"
+        response = await client.put("/org/update", headers=org["headers"], json={
+            "organization_name": org["name"], "new_organization_name": new_name
+        })
+        if 200 <= response.status_code < 300:
+            org["name"] = new_name
+        return response
+    results["rename"] = await run_scenario(renamed, rename, args.concurrency)
+
+    # A rename evicts the org from the lookup cache; read the renamed orgs
+    # back untimed so every delete starts from the same (cached) state
+    await run_scenario(orgs[:args.rename_ops], get, args.concurrency)
+
+    async def delete(org):
+        return await client.request("DELETE", "/org/delete", headers=org["headers"], json={
+            "organization_name": org["name"]
+        })
+    soft, immediate = orgs[:len(orgs) // 2], orgs[len(orgs) // 2:]
+    results["delete_soft"] = await run_scenario(soft, delete, args.concurrency)
+    await seed_tenants(immediate, args.tenant_docs)
+    mode, settings.ORG_DELETE_MODE = settings.ORG_DELETE_MODE, "immediate"
+    try:
+        results["delete_immediate"] = await run_scenario(immediate, delete, args.concurrency)
+    finally:
+        settings.ORG_DELETE_MODE = mode
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for scenario, base in baseline["results"].items():
+        current = results.get(scenario)
+        if current is None:
+            regressions.append(f"{scenario}: missing from this run")
+            continue
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{scenario}: throughput {current['throughput']}/s vs {base['throughput']}/s")
+        for key in LATENCY_KEYS:
+            if current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{scenario}: {key} {current[key]} vs {base[key]}")
+    return regressions
+
+
+def report(backend: str, config: dict, results: dict):
+    print(f"backend={backend} " + " ".join(f"{key}={value}" for key, value in config.items()))
+    print(f"{'scenario':<16} {'ops':>6} {'errors':>6} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<16} {r['ops']:>6} {r['errors']:>6} {r['throughput']:>9} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}"
+        )
+
+
+async def main(args) -> int:
+    settings.SALT_ROUNDS = args.salt_rounds
+    # Every tenant lands in the bench database, whatever placement says
+    settings.TENANT_CLUSTERS, settings.TENANT_DATABASES = {}, []
+    backend = await connect(args.backend)
+    await ensure_master_indexes()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            results = await run_suite(client, args)
+    finally:
+        if backend == "mongo":
+            await db_client.client.drop_database(settings.MASTER_DB_NAME)
+        shutdown_hash_executor()
+        tenant_router.close()
+        db_client.close()
+
+    config = {
+        "ops": args.ops,
+        "concurrency": args.concurrency,
+        "salt_rounds": args.salt_rounds,
+        "rename_ops": args.rename_ops,
+        "tenant_docs": args.tenant_docs,
+    }
+    report(backend, config, results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"backend": backend, "config": config, "results": results}, f, indent=2)
+
+    failed = any(r["errors"] for r in results.values())
+    if failed:
+        print("FAILED: some requests returned errors")
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{backend}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    elif args.check:
+        if not os.path.exists(baseline_path):
+            print(f"FAILED: no baseline at {baseline_path} (run with --save-baseline first)")
+            return 1
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            print(f"FAILED: baseline was recorded with {baseline['config']}")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {baseline_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["auto", "mongo", "mock"], default="auto")
+    parser.add_argument("--ops", type=int, default=200, help="orgs created (and logged in, fetched, deleted)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--salt-rounds", type=int, default=4)
+    parser.add_argument("--rename-ops", type=int, default=50, help="orgs renamed")
+    parser.add_argument("--tenant-docs", type=int, default=1000, help="documents per tenant purged by delete_immediate")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(asyncio.run(main(parser.parse_args())))
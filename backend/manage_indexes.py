@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import sys
+from app.db.client import db_client
+from app.db.indexes import ensure_master_indexes, index_report
+from app.db.tenant_router import tenant_router
+from app.services.tenant_index_service import TenantIndexService
+
+# Inspect or create the master DB indexes declared in app/db/indexes.py, and
+# the per-tenant templates declared in app/db/tenant_indexes.py.
+#
+#   python manage_indexes.py report
+#   python manage_indexes.py ensure
+#   python manage_indexes.py tenant-report
+#   python manage_indexes.py tenant-rollout
+
+
+async def main(command: str) -> bool:
+    db_client.connect()
+    try:
+        if command == "ensure":
+            results = await ensure_master_indexes()
+            for name, outcome in results.items():
+                print(f"{name}: {outcome}")
+            return all(outcome == "ok" for outcome in results.values())
+
+        if command == "tenant-report":
+            after, drifted = None, 0
+            while True:
+                page = await TenantIndexService.drift_report(500, after)
+                for tenant in page["drifted"]:
+                    problems = tenant["missing"] + ([tenant["error"]] if tenant.get("error") else [])
+                    print(f"{tenant['organization_name']} ({tenant['organization_id']}): {', '.join(problems)}")
+                drifted += len(page["drifted"])
+                after = page["next_after"]
+                if not after:
+                    break
+            print(f"{drifted} tenant(s) out of date")
+            return drifted == 0
+
+        if command == "tenant-rollout":
+            async def progress(processed: int, total: int = None):
+                if total is not None:
+                    print(f"{total} tenant(s) to check")
+                else:
+                    print(f"  {processed} checked")
+
+            result = await TenantIndexService.rollout(progress)
+            print(f"{result['tenants_built']} tenant(s) updated, {result['failed']} failure(s)")
+            for failure in result["failures"]:
+                print(f"  {failure['organization_id']} {failure['index']}: {failure['error']}")
+            return result["failed"] == 0
+
+        report = await index_report()
+        healthy = True
+        for collection, details in report.items():
+            print(f"{collection}:")
+            print(f"  missing:    {', '.join(details['missing']) or '-'}")
+            print(f"  undeclared: {', '.join(details['undeclared']) or '-'}")
+            unused = details["unused"]
+            print(f"  unused:     {'n/a ($indexStats not permitted)' if unused is None else ', '.join(unused) or '-'}")
+            healthy = healthy and not details["missing"]
+        return healthy
+    finally:
+        tenant_router.close()
+        db_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage master DB and tenant indexes")
+    parser.add_argument("command", choices=["report", "ensure", "tenant-report", "tenant-rollout"])
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    ok = asyncio.run(main(args.command))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import sys
+from app.db.client import db_client, get_master_db
+from app.db.tenant_router import DEFAULT_CLUSTER, tenant_router
+from app.services.migration_service import MigrationService
+
+# Moves tenant collections so placements match TENANT_CLUSTERS,
+# TENANT_DATABASES and TENANT_PLACEMENT. Orgs on targets that are no longer
+# configured are always moved. A tenant's writes get 503s while it moves;
+# each move also waits out the org cache twice (ORG_CACHE_TTL_SECONDS plus
+# TENANT_MOVE_FENCE_GRACE_SECONDS) so no process writes to a stale copy,
+# which is why --concurrency moves run side by side.
+#
+#   python rebalance_tenants.py --dry-run
+#   python rebalance_tenants.py [--limit N] [--concurrency N] [--strategy merge|streaming|buffered]
+
+
+async def rebalance(dry_run: bool, limit: int = None, strategy: str = None, concurrency: int = 4):
+    db_client.connect()
+    db = await get_master_db()
+    moved, failed = 0, 0
+    try:
+        placements = {}
+        cursor = db.organizations.find(
+            {"storage_key": {"$exists": True}, "deleted_at": None},
+            {"connection.cluster": 1, "connection.db_name": 1}
+        )
+        async for org in cursor:
+            connection = org["connection"]
+            placements[str(org["_id"])] = (connection.get("cluster", DEFAULT_CLUSTER), connection["db_name"])
+
+        moves = tenant_router.plan_rebalance(placements)
+        if limit is not None:
+            moves = moves[:limit]
+        print(f"{len(placements)} orgs, {len(moves)} to move")
+
+        slots = asyncio.Semaphore(max(1, concurrency))
+
+        async def move(org_id, source, target):
+            nonlocal moved, failed
+            label = f"{org_id}: {source[0]}/{source[1]} -> {target[0]}/{target[1]}"
+            if dry_run:
+                print(f"Would move {label}")
+                return
+            async with slots:
+                try:
+                    result = await MigrationService.move_tenant(org_id, target[0], target[1], strategy=strategy)
+                    moved += 1
+                    print(f"Moved {label}: {result}")
+                except Exception as e:
+                    failed += 1
+                    print(f"ERROR: Failed to move {label}: {getattr(e, 'detail', e)}")
+
+        await asyncio.gather(*(move(org_id, source, target) for org_id, source, target in moves))
+    finally:
+        tenant_router.close()
+        db_client.close()
+
+    if not dry_run:
+        print(f"Rebalance finished: {moved} moved, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move tenant collections to their configured placement")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=4, help="tenants moved at a time")
+    parser.add_argument("--strategy", default=None)
+    args = parser.parse_args()
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    ok = asyncio.run(rebalance(args.dry_run, args.limit, args.strategy, args.concurrency))
+    sys.exit(0 if ok else 1)
@@ -20,6 +20,12 @@ async def client():
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
 
+@pytest.fixture
+def ops_headers():
+    # Operator credential for /ops, /org/list and /org/bulk-create
+    settings.OPS_TOKENS = ["test-ops-token"]
+    return {"X-Ops-Token": "test-ops-token"}
+
 @pytest.fixture(scope="module")
 async def test_db():
     # Setup
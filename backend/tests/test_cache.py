@@ -0,0 +1,41 @@
+import time
+from app.core.cache import TTLCache, MISSING
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry_and_negative_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("org", {"_id": 1})
+    cache.set("missing", None, ttl=5)
+
+    assert cache.get("missing") is None
+    now[0] += 6
+    assert cache.get("missing") is MISSING
+    assert cache.get("org") == {"_id": 1}
+    now[0] += 30
+    assert cache.get("org") is MISSING
+    assert cache.stats()["expirations"] == 2
+
+
+def test_invalidation_discards_stale_loads():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation
+    cache.invalidate_where(lambda key, value: True)
+    # A load that started before the invalidation must not be cached
+    cache.set("org", {"_id": 1}, generation=generation)
+    assert cache.get("org") is MISSING
+    cache.set("org", {"_id": 1}, generation=cache.generation)
+    assert cache.get("org") == {"_id": 1}
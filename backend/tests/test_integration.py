@@ -37,6 +37,26 @@ async def test_create_org_duplicate(client: AsyncClient):
     })
     assert response.status_code == 409
 
+@pytest.mark.asyncio
+async def test_bulk_create_org_partial_failure(client: AsyncClient, ops_headers: dict):
+    bulk_org = {"organization_name": "testorg-bulk", "email": "admin@testorg-bulk.com", "password": "SecurePassword123!"}
+    response = await client.post("/org/bulk-create", headers=ops_headers, json={"organizations": [
+        {"organization_name": test_data["org_name"], "email": "bulk@test.com", "password": "SecurePassword123!"},
+        bulk_org,
+    ]})
+    assert response.status_code == 207
+    results = response.json()["results"]
+    assert [result["status_code"] for result in results] == [409, 201]
+    assert results[1]["organization"]["organization_name"] == bulk_org["organization_name"]
+
+    # Cleanup
+    login = await client.post("/admin/login", json={"email": bulk_org["email"], "password": bulk_org["password"]})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    response = await client.request("DELETE", "/org/delete", headers=headers, json={
+        "organization_name": bulk_org["organization_name"]
+    })
+    assert response.status_code == 200
+
 @pytest.mark.asyncio
 async def test_admin_login(client: AsyncClient):
     response = await client.post("/admin/login", json={
@@ -48,6 +68,14 @@ async def test_admin_login(client: AsyncClient):
     assert "access_token" in data
     test_data["token"] = data["access_token"]
 
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_admin_token(client: AsyncClient, ops_headers: dict):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    response = await client.post("/org/bulk-create", headers=headers, json={"organizations": [
+        {"organization_name": "testorg-nobulk", "email": "admin@testorg-nobulk.com", "password": "SecurePassword123!"}
+    ]})
+    assert response.status_code == 403
+
 @pytest.mark.asyncio
 async def test_get_org_authenticated(client: AsyncClient):
     # This endpoint is currently public in logic but let's assume we want to test data correctness
@@ -59,7 +87,8 @@ async def test_get_org_authenticated(client: AsyncClient):
 @pytest.mark.asyncio
 async def test_rename_org(client: AsyncClient):
     headers = {"Authorization": f"Bearer {test_data['token']}"}
-    new_name = "testorg_renamed"
+    new_name = "testorg-renamed"
+    before = await client.get(f"/org/get?organization_name={test_data['org_name']}")
     response = await client.put("/org/update", headers=headers, json={
         "organization_name": test_data["org_name"],
         "new_organization_name": new_name
@@ -67,10 +96,81 @@ async def test_rename_org(client: AsyncClient):
     assert response.status_code == 200
     data = response.json()
     assert data["organization"]["organization_name"] == new_name
-    
+    # Renames only touch metadata; the tenant collection stays put
+    assert data["organization"]["collection_name"] == before.json()["organization"]["collection_name"]
+    assert data["organization"]["storage_key"] == f"org_{data['organization']['id']}"
+
     # Update test_data for cleanup
     test_data["org_name"] = new_name
 
+@pytest.mark.asyncio
+async def test_rename_org_invalid_name(client: AsyncClient):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    response = await client.put("/org/update", headers=headers, json={
+        "organization_name": test_data["org_name"],
+        "new_organization_name": "testorg_invalid"
+    })
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_list_orgs(client: AsyncClient, ops_headers: dict):
+    response = await client.get("/org/list", headers=ops_headers, params={
+        "name_prefix": test_data["org_name"], "fields": "organization_name", "limit": 1
+    })
+    assert response.status_code == 200
+    orgs = response.json()["organizations"]
+    assert orgs[0]["organization_name"] == test_data["org_name"]
+    assert set(orgs[0]) == {"id", "organization_name"}
+
+@pytest.mark.asyncio
+async def test_list_orgs_rejects_admin_token(client: AsyncClient, ops_headers: dict):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    response = await client.get("/org/list", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_tenant_documents_paging(client: AsyncClient):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    base = f"/org/{test_data['org_name']}/documents"
+    response = await client.post(base, headers=headers, json={"documents": [{"n": i} for i in range(5)]})
+    assert response.status_code == 201
+
+    seen, continuation = [], None
+    while True:
+        body = {"sort": {"n": -1}, "limit": 2, "projection": {"n": 1, "_id": 0}}
+        if continuation:
+            body["continuation"] = continuation
+        page = (await client.post(f"{base}/query", headers=headers, json=body)).json()
+        seen += [doc["n"] for doc in page["documents"]]
+        continuation = page["next_continuation"]
+        if not continuation:
+            break
+    assert seen == [4, 3, 2, 1, 0]
+
+@pytest.mark.asyncio
+async def test_tenant_documents_invalid_continuation(client: AsyncClient):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    base = f"/org/{test_data['org_name']}/documents"
+    # base64 of "[1]" and of {"q": "x"}: valid JSON, wrong shape
+    for continuation in ("WzFd", "eyJxIjogIngifQ=="):
+        response = await client.post(f"{base}/query", headers=headers, json={"continuation": continuation})
+        assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_import_malformed_extended_json(client: AsyncClient):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    response = await client.post(
+        f"/org/{test_data['org_name']}/import", headers=headers, content=b'{"_id": {"$oid": "zz"}}\n'
+    )
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_list_jobs(client: AsyncClient):
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    response = await client.get("/org/jobs", headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
 @pytest.mark.asyncio
 async def test_delete_org(client: AsyncClient):
     headers = {"Authorization": f"Bearer {test_data['token']}"}
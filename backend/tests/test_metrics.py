@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+import threading
+import pytest
+from app.core.metrics import Histogram, REGISTRY, render_family
+from app.db.monitoring import CommandMetricsListener, mongo_command_duration, mongo_command_failures
+
+
+def test_histogram_merges_thread_shards():
+    histogram = Histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    REGISTRY.remove(histogram)
+
+    def record():
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(("/a",), value)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = render_family(histogram.name, histogram.kind, histogram.documentation, histogram.samples())
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 4' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 8' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 12' in text
+    assert 'test_latency_seconds_count{route="/a"} 12' in text
+
+
+def test_command_listener_labels_collections():
+    listener = CommandMetricsListener()
+
+    def run(request_id, command_name, command, database_name, failed=False):
+        listener.started(SimpleNamespace(
+            connection_id=("db", 27017), request_id=request_id,
+            command_name=command_name, command=command, database_name=database_name
+        ))
+        finished = SimpleNamespace(
+            connection_id=("db", 27017), request_id=request_id, command_name=command_name, duration_micros=2000
+        )
+        (listener.failed if failed else listener.succeeded)(finished)
+
+    before = dict(mongo_command_duration._merged())
+    run(1, "find", {"find": "organizations"}, "master_db")
+    run(2, "insert", {"insert": "org_123"}, "master_db", failed=True)
+    run(3, "getMore", {"getMore": 42, "collection": "org_456"}, "tenants_a")
+    after = mongo_command_duration._merged()
+
+    def observed(labels):
+        return after[labels][-1] - (before[labels][-1] if labels in before else 0)
+
+    assert observed(("find", "organizations")) == pytest.approx(0.002)
+    assert observed(("insert", "tenant")) == pytest.approx(0.002)
+    assert observed(("getMore", "tenant")) == pytest.approx(0.002)
+    assert mongo_command_failures._merged()[("insert", "tenant")] >= 1
+    assert listener._pending == {}
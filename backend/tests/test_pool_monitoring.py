@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+from app.db.monitoring import PoolStatsListener
+
+ADDRESS = ("db.example.com", 27017)
+
+
+def test_pool_listener_tracks_checkouts_and_clears():
+    listener = PoolStatsListener(max_pool_size=4)
+    listener.pool_created(SimpleNamespace(address=ADDRESS))
+    for wait in (0.001, 0.003):
+        listener.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+        listener.connection_created(SimpleNamespace(address=ADDRESS))
+        listener.connection_checked_out(SimpleNamespace(address=ADDRESS, duration=wait))
+    listener.connection_checked_in(SimpleNamespace(address=ADDRESS))
+    listener.connection_check_out_started(SimpleNamespace(address=ADDRESS))
+    listener.connection_check_out_failed(SimpleNamespace(address=ADDRESS, reason="timeout", duration=0.5))
+    listener.pool_cleared(SimpleNamespace(address=ADDRESS))
+
+    stats = listener.stats()["servers"]["db.example.com:27017"]
+    assert stats["open"] == 2
+    assert stats["in_use"] == 1
+    assert stats["max_in_use"] == 2
+    assert stats["utilization"] == 0.25
+    assert stats["waiting"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["checkout_failures"] == {"timeout": 1}
+    assert stats["wait_ms"]["max"] == 3.0
+    assert stats["wait_ms"]["avg"] == 2.0
+    assert stats["cleared"] == 1
@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+from app.db import master_repo as master_repo_module
+from app.db.master_repo import MasterRepository, org_cache
+
+
+class CountingCollection:
+    def __init__(self, doc):
+        self.doc = doc
+        self.calls = 0
+
+    async def find_one(self, query):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return self.doc
+
+
+class FakeDB:
+    def __init__(self, organizations, admins):
+        self.organizations = organizations
+        self.admins = admins
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_lookup():
+    flight = SingleFlight()
+    calls = 0
+
+    async def lookup():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    results = await asyncio.gather(*[flight.do("key", lookup) for _ in range(50)])
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "shared": 49}
+
+    # Once finished, the next call starts a fresh lookup
+    await flight.do("key", lookup)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_waiters_share_exception_and_survive_cancellation():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    first = asyncio.ensure_future(flight.do("key", failing))
+    others = [asyncio.ensure_future(flight.do("key", failing)) for _ in range(5)]
+    await asyncio.sleep(0)
+    first.cancel()
+
+    results = await asyncio.gather(*others, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_master_repo_coalesces_concurrent_reads(monkeypatch):
+    org = {"_id": "665f00000000000000000001", "organization_name": "hot"}
+    db = FakeDB(CountingCollection(org), CountingCollection({"email": "a@hot.com"}))
+
+    async def fake_master_db():
+        return db
+
+    monkeypatch.setattr(master_repo_module, "get_master_db", fake_master_db)
+    org_cache.clear()
+
+    orgs = await asyncio.gather(*[MasterRepository.get_org_by_name("hot") for _ in range(100)])
+    admins = await asyncio.gather(*[MasterRepository.get_admin_by_email("a@hot.com") for _ in range(100)])
+
+    assert db.organizations.calls == 1
+    assert db.admins.calls == 1
+    assert all(o is org for o in orgs)
+    assert all(a["email"] == "a@hot.com" for a in admins)
+    org_cache.clear()
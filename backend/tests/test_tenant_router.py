@@ -0,0 +1,33 @@
+from app.core.config import settings
+from app.db.tenant_router import TenantRouter
+
+
+def test_hash_placement_moves_few_orgs_when_a_target_is_added(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_CLUSTERS", {})
+    monkeypatch.setattr(settings, "TENANT_DATABASES", ["t1", "t2", "t3"])
+    monkeypatch.setattr(settings, "TENANT_PLACEMENT", "hash")
+    router = TenantRouter()
+    org_ids = [f"{i:024x}" for i in range(3000)]
+    placements = {org_id: router.hash_target(org_id) for org_id in org_ids}
+    assert set(placements.values()) == set(router.targets())
+
+    monkeypatch.setattr(settings, "TENANT_DATABASES", ["t1", "t2", "t3", "t4"])
+    moves = router.plan_rebalance(placements)
+    # Only orgs claimed by the new target move, about a quarter of them
+    assert all(to == ("default", "t4") for _, _, to in moves)
+    assert 0.15 < len(moves) / len(org_ids) < 0.35
+
+
+def test_least_loaded_rebalance_evens_out_and_drains_removed_targets(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_CLUSTERS", {"a": "mongodb://a", "b": "mongodb://b"})
+    monkeypatch.setattr(settings, "TENANT_DATABASES", ["tenants"])
+    monkeypatch.setattr(settings, "TENANT_PLACEMENT", "least_loaded")
+    placements = {str(i): ("a", "tenants") for i in range(6)}
+    placements["old"] = ("removed", "tenants")
+
+    moves = TenantRouter().plan_rebalance(placements)
+    final = {**placements, **{org_id: to for org_id, _, to in moves}}
+    counts = [list(final.values()).count(target) for target in (("a", "tenants"), ("b", "tenants"))]
+    assert sorted(counts) == [3, 4]
+    assert final["old"] != ("removed", "tenants")
+    assert len({org_id for org_id, _, _ in moves}) == len(moves)